@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare bytes written to the terminal by each render backend.
+
+Each backend is driven through the same autopilot keystrokes inside a pseudo
+terminal, and everything it writes to the terminal is counted::
+
+  python benchmark/backends.py test/turnstile_161112.txt
+"""
+
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import curses
+import fcntl
+import json
+import locale
+import os
+import pty
+import struct
+import sys
+import termios
+from argparse import ArgumentParser
+from time import time
+
+# Import dabbiew from this checkout, however the script is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dabbiew.dabbiew import run, to_dataframe, AnsiWindow
+
+
+scenarios = {
+    'hold j': 'j' * 200,
+    'hold l': 'l' * 30,
+    'page down': '\x06' * 20,
+    'select and resize': 'v' + 'l' * 5 + 'j' * 20 + '.' * 5 + '<' * 3,
+}
+
+
+def drive(backend, df, keys, lines, columns):
+    """Run one backend on keys in a pseudo terminal.
+
+    :returns: bytes written to the terminal and seconds taken
+    :rtype: int, float
+    """
+    pid, fd = pty.fork()
+    if pid == 0:
+        fcntl.ioctl(0, termios.TIOCSWINSZ,
+                    struct.pack(b'HHHH', lines, columns, 0, 0))
+        os.environ[str('TERM')] = str('xterm')
+        locale.setlocale(locale.LC_ALL, '')
+        keystrokes = iter(ord(key) for key in keys + 'q')
+        if backend == 'curses':
+            curses.wrapper(run, df, keystrokes)
+        else:
+            with AnsiWindow() as window:
+                run(window, df, keystrokes)
+        os._exit(0)
+    written, start = 0, time()
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        written += len(data)
+    os.waitpid(pid, 0)
+    return written, time() - start
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('filepath', help='csv or Excel file to open')
+    parser.add_argument('--lines', type=int, default=80)
+    parser.add_argument('--columns', type=int, default=300)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+    df = to_dataframe(args.filepath)
+    results = []
+    for name, keys in sorted(scenarios.items()):
+        for backend in ('curses', 'ansi'):
+            written, seconds = drive(backend, df, keys, args.lines, args.columns)
+            results.append({'scenario': name, 'backend': backend,
+                            'frames': len(keys) + 1, 'bytes': written,
+                            'seconds': seconds})
+            print('{:<20} {:<8} {:>6} frames {:>10} bytes {:>8.0f} bytes/frame '
+                  '{:>7.2f} s'.format(name, backend, len(keys) + 1, written,
+                                      written / (len(keys) + 1), seconds))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Time the hot paths of dabbiew on real and generated DataFrames.
+
+Every benchmark runs headless on a VirtualScreen, on the given file and on
+generated wide, long, string-heavy and numeric-heavy frames of 10^3 to 10^8
+cells, and results are written as JSON to track them between releases::
+
+  python benchmark/suite.py --file test/turnstile_161112.txt --cells 3 4 5 6 \\
+      --output results.json
+"""
+
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from argparse import ArgumentParser
+from time import time
+
+import numpy as np
+import pandas as pd
+
+# Import dabbiew from this checkout, however the script is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dabbiew.dabbiew import (VirtualScreen, Frame, CellCache, SearchCache,
+                             Command, draw, screen, origin, next_match,
+                             prev_match, expand_cumsum, contract_cumsum, run,
+                             to_dataframe)
+from dabbiew.version import get_git_version
+
+
+words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf',
+         'hotel', 'india', 'juliett', 'kilo', 'lima', 'mike', 'november',
+         'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango', 'uniform',
+         'victor', 'whiskey', 'x-ray', 'yankee', 'zulu']
+
+missing = 'qqqq'  # never present in generated data, so searches sweep it all
+
+
+def wide_frame(cells, random):
+    """Numbers in up to 1000 columns."""
+    cols = max(1, min(1000, cells // 10))
+    return pd.DataFrame(random.randint(0, 10**6, (cells // cols, cols)))
+
+
+def long_frame(cells, random):
+    """Four columns of mixed types."""
+    rows = max(1, cells // 4)
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'value': random.standard_normal(rows),
+        'name': np.array(words, dtype=object)[random.randint(0, len(words), rows)],
+        'time': pd.Timestamp('2016-11-05') +
+                pd.to_timedelta(random.randint(0, 10**7, rows), unit='s'),
+    }, columns=['id', 'value', 'name', 'time'])
+
+
+def strings_frame(cells, random):
+    """Eight columns of one to three words each."""
+    rows = max(1, cells // 8)
+    vocabulary = np.array(words, dtype=object)
+    return pd.DataFrame({
+        col: vocabulary[random.randint(0, len(words), rows)] +
+             np.where(random.randint(0, 2, rows), ' ', '') +
+             np.where(random.randint(0, 3, rows), vocabulary[random.randint(0, len(words), rows)], '')
+        for col in range(8)})
+
+
+def numbers_frame(cells, random):
+    """Eight columns of alternating floats and integers."""
+    rows = max(1, cells // 8)
+    return pd.DataFrame({
+        col: random.standard_normal(rows) * 10**col if col % 2 else
+             random.randint(-10**col, 10**col + 1, rows)
+        for col in range(8)})
+
+
+shapes = [('wide', wide_frame), ('long', long_frame),
+          ('strings', strings_frame), ('numbers', numbers_frame)]
+
+
+def timed(func, repeat):
+    """Run func repeat times.
+
+    :returns: fastest time in seconds
+    :rtype: float
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time()
+        func()
+        best = min(best, time() - start)
+    return best
+
+
+def session(df, keys, lines, columns):
+    """Run the main loop on keys until they run out.
+
+    :returns: seconds taken
+    :rtype: float
+    """
+    keystrokes = iter([ord(key) for key in keys + 'q'])
+    start = time()
+    run(VirtualScreen(lines, columns), df, keystrokes)
+    return time() - start
+
+
+def benchmarks(df, args):
+    """Time each hot path on df.
+
+    :returns: benchmark name, seconds and number of operations timed, or None
+        seconds if skipped
+    :rtype: generator yielding (str, float, int)
+    """
+    rows, cols = df.shape
+    lines, columns = args.lines, args.columns
+    cum_heights = np.append(np.array([0]), np.full(rows, 1).cumsum())
+    cum_widths = np.append(np.array([0]), np.full(cols, 10).cumsum())
+
+    # Rendering: a cold first frame, then frames from the main loop
+    def first_frame():
+        draw(VirtualScreen(lines, columns), df, 1, 8, lines - 2, columns - 8,
+             0, 0, 0, 0, 0, 0, None, None, cum_widths, cum_heights,
+             True, True, False, Frame(), CellCache())
+    yield 'draw first frame', timed(first_frame, args.repeat), 1
+    baseline = session(df, '', lines, columns)
+    for name, keys in [('draw hold j', 'j' * 200), ('draw hold l', 'l' * 30),
+                       ('draw page down', '\x06' * 20)]:
+        yield name, session(df, keys, lines, columns) - baseline, len(keys)
+
+    # Layout
+    calls = 1000
+    def screens():
+        for col in range(calls):
+            screen(col % cols, col % cols, cum_widths, 8)
+    yield 'screen', timed(screens, args.repeat), calls
+    def origins():
+        for col in range(calls):
+            origin(0, col % cols, col % cols, cum_widths, columns - 8, True)
+    yield 'origin', timed(origins, args.repeat), calls
+    yield 'expand_cumsum', timed(
+        lambda: expand_cumsum(0, cols - 1, cum_widths, 1), args.repeat), 1
+    yield 'contract_cumsum', timed(
+        lambda: contract_cumsum(0, cols - 1, cum_widths, 1), args.repeat), 1
+
+    # Searching for a missing string sweeps every cell
+    if df.size <= args.max_search_cells:
+        yield 'next_match', timed(lambda: next_match(df, missing, 0, 0), 1), 1
+        yield 'prev_match', timed(
+            lambda: prev_match(df, missing, rows - 1, cols - 1), 1), 1
+        search = SearchCache()
+        next_match(df, missing, 0, 0, search)
+        yield 'next_match cached', timed(
+            lambda: next_match(df, missing, 0, 0, search), args.repeat), 1
+        # Every frame is split across processes, however small
+        for processes in args.processes:
+            search = SearchCache(processes=processes, parallel_cells=0)
+            yield 'next_match {}p'.format(processes), timed(
+                lambda: next_match(df, missing, 0, 0, search), 1), 1
+            yield 'next_match cached {}p'.format(processes), timed(
+                lambda: next_match(df, missing, 0, 0, search), args.repeat), 1
+            search.close()
+    else:
+        yield 'next_match', None, 1
+        yield 'prev_match', None, 1
+        yield 'next_match cached', None, 1
+        for processes in args.processes:
+            yield 'next_match {}p'.format(processes), None, 1
+            yield 'next_match cached {}p'.format(processes), None, 1
+
+    # Sorting as the s and S keys do, less drawing the first frame
+    for key in 'sS':
+        yield key + ' sort', session(df, key, lines, columns) - baseline, 1
+
+    # Commands on a single cell apply to the whole DataFrame, and are called
+    # in a forked process as the : key does
+    def command():
+        Command(df, 'describe()', 0, 0, 0, 0).wait()
+    yield 'command', timed(command, args.repeat), 1
+
+
+def load(df, args):
+    """Write df as csv and time reading it back.
+
+    :returns: seconds taken, or None if skipped
+    :rtype: float
+    """
+    if df.size > args.max_load_cells:
+        return None
+    directory = tempfile.mkdtemp()
+    try:
+        filepath = os.path.join(directory, 'frame.csv')
+        df.to_csv(filepath, index=False, encoding='utf-8')
+        return timed(lambda: to_dataframe(filepath), args.repeat)
+    finally:
+        shutil.rmtree(directory)
+
+
+def datasets(args):
+    """Yield every DataFrame to benchmark.
+
+    :returns: dataset name, DataFrame and seconds taken to load from disk
+    :rtype: generator yielding (str, pandas.DataFrame, float)
+    """
+    for filepath in args.file:
+        start = time()
+        df = to_dataframe(filepath)
+        yield os.path.basename(filepath), df, time() - start
+    for exponent in args.cells:
+        for shape, generate in shapes:
+            df = generate(10**exponent, np.random.RandomState(exponent))
+            yield '{} 1e{}'.format(shape, exponent), df, load(df, args)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', action='append', default=[],
+                        help='csv or Excel file to benchmark, may be repeated')
+    parser.add_argument('--cells', type=int, nargs='*', default=[3, 4, 5, 6],
+                        help='powers of ten of cells in generated frames')
+    parser.add_argument('--lines', type=int, default=40)
+    parser.add_argument('--columns', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='take the fastest of this many runs')
+    parser.add_argument('--processes', type=int, nargs='*',
+                        default=sorted({2, multiprocessing.cpu_count()}),
+                        help='numbers of processes to also search with')
+    parser.add_argument('--max-search-cells', type=int, default=10**8,
+                        help='skip searching larger frames')
+    parser.add_argument('--max-load-cells', type=int, default=10**6,
+                        help='skip writing and loading larger generated frames')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+    results = []
+    for name, df, seconds in datasets(args):
+        rows, cols = df.shape
+        timings = [('load', seconds, 1)] + list(benchmarks(df, args))
+        for benchmark, seconds, operations in timings:
+            results.append({'dataset': name, 'rows': rows, 'cols': cols,
+                            'cells': df.size, 'benchmark': benchmark,
+                            'seconds': seconds, 'operations': operations})
+            print('{:<24} {:>10} cells {:<22} {}'.format(
+                name, df.size, benchmark, 'skipped' if seconds is None else
+                '{:>10.6f} s {:>12.9f} s/op'.format(seconds, seconds / operations)))
+    try:
+        version = get_git_version()
+    except ValueError:
+        version = None
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'version': version,
+                       'python': platform.python_version(),
+                       'numpy': np.__version__, 'pandas': pd.__version__,
+                       'lines': args.lines, 'columns': args.columns,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
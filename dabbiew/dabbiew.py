@@ -5,12 +5,26 @@ from  __future__ import division, absolute_import, print_function, unicode_liter
 
 import curses
 import curses.textpad
+import fcntl
 import locale
+import multiprocessing
+import numbers
 import numpy as np
+import operator
+import os
 import pandas as pd
-from collections import deque
+import re
+import select
+import struct
+import termios
+import threading
+import tty
+from Queue import Queue
+from collections import deque, OrderedDict
+from pandas.api.types import is_categorical_dtype, is_datetime64tz_dtype
+from pandas.core.sorting import nargsort
 from sys import argv
-from time import sleep
+from time import sleep, time
 
 
 def debug(stdscr):
@@ -19,16 +33,509 @@ def debug(stdscr):
     https://stackoverflow.com/a/2949419/5101335
 
     :param stdscr: window object to reset
-    :type stdscr: curses.window
+    :type stdscr: curses.window or AnsiWindow
     """
     from ipdb import set_trace
-    curses.nocbreak()
-    stdscr.keypad(0)
-    curses.echo()
-    curses.endwin()
+    if isinstance(stdscr, AnsiWindow):
+        stdscr.stop() # restarted by the next refresh
+    else:
+        curses.nocbreak()
+        stdscr.keypad(0)
+        curses.echo()
+        curses.endwin()
     set_trace()
 
 
+class Window(object):
+    """In-memory grid of character cells behaving like a curses window.
+
+    Implements the part of the curses window interface used by run() and
+    draw(), so that they can render somewhere other than a curses terminal.
+    Subclasses decide where keystrokes come from in read_key() and what
+    refresh() does with the cells. Pads are copied onto a layer above the
+    cells rather than into them, and stay on top until touchwin() or erase(),
+    as curses shows them over a window until it is touched and refreshed.
+
+    >>> window = Window(2, 8)
+    >>> window.addstr(0, 2, 'spam', curses.A_REVERSE)
+    >>> window.addstr(1, 0, 'eggs')
+    >>> window.move(1, 2)
+    >>> window.clrtoeol()
+    >>> window.text()
+    [u'  spam  ', u'eg      ']
+    >>> window.cells[0][2] == ('s', curses.A_REVERSE)
+    True
+
+    :param lines: number of lines
+    :type lines: int
+    :param columns: number of columns
+    :type columns: int
+    """
+
+    blank = ' ', curses.A_NORMAL
+
+    def __init__(self, lines, columns):
+        self.lines, self.columns = lines, columns
+        self.cells = [[self.blank] * columns for y_cursor in range(lines)]
+        self.layer = {} # line -> (column, cells) copied from pads, in order
+        self.cursor = 0, 0
+        self.region = 0, lines - 1
+        self.scrolling = False
+        self.delay = -1
+        self.visibility = 1
+        self.pushed = []
+
+    def text(self):
+        """Return characters on each line, ignoring attributes."""
+        return [''.join(char for char, attribute in line)
+                for line in self.composite()]
+
+    def composite(self):
+        """Return the cells with the pads copied onto them on top."""
+        lines = list(self.cells)
+        for y_cursor, copies in self.layer.items():
+            line = lines[y_cursor] = list(lines[y_cursor])
+            for x_cursor, cells in copies:
+                line[x_cursor:x_cursor + len(cells)] = cells
+        return lines
+
+    def getmaxyx(self):
+        return self.lines, self.columns
+
+    def move(self, y_cursor, x_cursor):
+        self.cursor = int(y_cursor), int(x_cursor)
+
+    def addstr(self, *args):
+        """Write text at a position (or at the cursor) with an attribute."""
+        if isinstance(args[0], numbers.Integral):
+            self.move(*args[:2])
+            args = args[2:]
+        text, attribute = args[0], args[1] if len(args) > 1 else curses.A_NORMAL
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        y_cursor, x_cursor = self.cursor
+        for char in text:
+            if y_cursor >= self.lines:
+                raise curses.error('addstr() returned ERR')
+            self.cells[y_cursor][x_cursor] = char, attribute
+            x_cursor += 1
+            if x_cursor == self.columns:
+                y_cursor, x_cursor = y_cursor + 1, 0
+        self.cursor = min(y_cursor, self.lines - 1), x_cursor
+
+    def clrtoeol(self):
+        y_cursor, x_cursor = self.cursor
+        line = self.cells[y_cursor]
+        line[x_cursor:] = [self.blank] * (self.columns - x_cursor)
+
+    def erase(self):
+        self.cells = [[self.blank] * self.columns for y_cursor in range(self.lines)]
+        self.layer = {}
+
+    def clear(self):
+        self.erase()
+
+    def scrollok(self, flag):
+        self.scrolling = flag
+
+    def setscrreg(self, top, bottom):
+        self.region = top, bottom
+
+    def scroll(self, lines=1):
+        """Move lines of the scrolling region up (down if negative)."""
+        if not self.scrolling:
+            raise curses.error('scroll() returned ERR')
+        top, bottom = self.region
+        shift(self.cells, top, bottom, lines, [self.blank] * self.columns)
+
+    def idlok(self, flag):
+        pass
+
+    def keypad(self, flag):
+        pass
+
+    def touchwin(self):
+        self.layer = {}
+
+    def newpad(self, lines, columns):
+        """Return a Pad to copy parts of onto this window."""
+        return Pad(self, lines, columns)
+
+    def refresh(self):
+        pass
+
+    def noutrefresh(self):
+        self.refresh()
+
+    def curs_set(self, visibility):
+        self.visibility, previous = visibility, self.visibility
+        return previous
+
+    def timeout(self, delay):
+        self.delay = delay
+
+    def ungetch(self, keystroke):
+        self.pushed.append(keystroke)
+
+    def getch(self):
+        """Return next keystroke or -1 if none arrives in time."""
+        if self.pushed:
+            return self.pushed.pop()
+        return self.read_key()
+
+    def read_key(self):
+        return -1
+
+    def edit(self, y_cursor, x_cursor, width):
+        """Read a line of text typed at a position, like a curses Textbox.
+
+        :param y_cursor: line to type on
+        :type y_cursor: int
+        :param x_cursor: column of first character typed
+        :type x_cursor: int
+        :param width: width of input field
+        :type width: int
+        :returns: text typed before return, escape or control-G
+        :rtype: str
+        """
+        string = ''
+        while True:
+            self.move(y_cursor, x_cursor + len(string))
+            self.refresh()
+            keystroke = self.getch()
+            if keystroke in (-1, 7, 10, 13, 27):
+                return string
+            elif keystroke in (8, 127, curses.KEY_BACKSPACE):
+                string = string[:-1]
+                self.addstr(y_cursor, x_cursor + len(string), ' ')
+            elif 32 <= keystroke < 127 and len(string) < width - 1:
+                self.addstr(y_cursor, x_cursor + len(string), chr(keystroke))
+                string += chr(keystroke)
+
+
+class Pad(Window):
+    """Window larger than the screen, parts of which are copied onto another
+    window, like a curses pad.
+
+    >>> window = Window(2, 8)
+    >>> pad = window.newpad(1, 6)
+    >>> pad.addstr(0, 0, 'spam')
+    >>> pad.chgat(0, 1, 2, curses.A_REVERSE)
+    >>> pad.noutrefresh(0, 1, 1, 4, 1, 6)
+    >>> window.text()
+    [u'        ', u'    pam ']
+    >>> window.composite()[1][5] == ('a', curses.A_REVERSE), window.cells[1][5]
+    (True, (u' ', 0))
+    >>> window.touchwin()
+    >>> window.text()
+    [u'        ', u'        ']
+
+    :param window: window to copy onto
+    :type window: Window
+    :param lines: number of lines
+    :type lines: int
+    :param columns: number of columns
+    :type columns: int
+    """
+
+    def __init__(self, window, lines, columns):
+        super(Pad, self).__init__(lines, columns)
+        self.window = window
+
+    def chgat(self, y_cursor, x_cursor, width, attribute):
+        """Set the attribute of width cells, keeping their characters."""
+        line = self.cells[y_cursor]
+        line[x_cursor:x_cursor + width] = [
+                (char, attribute) for char, _ in line[x_cursor:x_cursor + width]]
+
+    def noutrefresh(self, pad_y, pad_x, top, left, bottom, right):
+        """Copy part of the pad onto the window's layer, corners included."""
+        for y_cursor in range(top, bottom + 1):
+            self.window.layer.setdefault(y_cursor, []).append((left,
+                    self.cells[pad_y + y_cursor - top][pad_x:pad_x + right + 1 - left]))
+
+
+def shift(grid, top, bottom, lines, blank):
+    """Scroll lines top to bottom of a grid in place, filling with blank.
+
+    >>> grid = [[0], [1], [2], [3]]
+    >>> shift(grid, 1, 3, 1, [9])
+    >>> grid
+    [[0], [2], [3], [9]]
+    >>> shift(grid, 1, 3, -2, [9])
+    >>> grid
+    [[0], [9], [9], [2]]
+
+    :param grid: lines to scroll
+    :type grid: list of list
+    :param top: first line of scrolling region
+    :type top: int
+    :param bottom: last line of scrolling region
+    :type bottom: int
+    :param lines: number of lines to scroll up (down if negative)
+    :type lines: int
+    :param blank: contents of lines scrolled in
+    :type blank: list
+    """
+    region = grid[top:bottom+1]
+    count = min(abs(lines), len(region))
+    blanks = [list(blank) for i in range(count)]
+    region = region[count:] + blanks if lines > 0 else blanks + region[:len(region)-count]
+    grid[top:bottom+1] = region
+
+
+def ansi_attribute(attribute):
+    """Select graphic rendition escape sequence for a curses attribute.
+
+    >>> ansi_attribute(curses.A_NORMAL)
+    u'\\x1b[0m'
+    >>> ansi_attribute(curses.A_REVERSE | curses.A_UNDERLINE)
+    u'\\x1b[0;4;7m'
+
+    :param attribute: curses attribute
+    :type attribute: int
+    :returns: escape sequence
+    :rtype: str
+    """
+    codes = ['0'] + [code for flag, code in ((curses.A_BOLD, '1'),
+                                             (curses.A_UNDERLINE, '4'),
+                                             (curses.A_REVERSE, '7'))
+                     if attribute & flag]
+    return '\x1b[{}m'.format(';'.join(codes))
+
+
+class AnsiWindow(Window):
+    """Window drawing to a terminal with raw ANSI escape sequences.
+
+    Each refresh compares the cells with what the terminal shows and writes a
+    single buffer containing only the changes: the cursor is moved only to
+    skip over unchanged cells and attributes are only selected when they
+    change. Counts of frames and bytes written are kept for benchmarking.
+    Use it as a context manager to set up and restore the terminal.
+
+    >>> window = AnsiWindow(fd_out=os.pipe()[1])
+    >>> window.curs_set(0)
+    1
+    >>> window.changes()
+    '\\x1b[0m\\x1b[2J\\x1b[?25l'
+    >>> window.addstr(0, 0, 'ab', curses.A_REVERSE)
+    >>> window.addstr(0, 4, 'c', curses.A_REVERSE)
+    >>> window.changes()
+    '\\x1b[1;1H\\x1b[0;7mab\\x1b[1;5Hc'
+    >>> window.changes()
+    ''
+
+    :param fd_in: file descriptor to read keystrokes from
+    :type fd_in: int
+    :param fd_out: file descriptor of terminal to draw to
+    :type fd_out: int
+    """
+
+    keys = (('\x1b[A', curses.KEY_UP), ('\x1b[B', curses.KEY_DOWN),
+            ('\x1b[C', curses.KEY_RIGHT), ('\x1b[D', curses.KEY_LEFT),
+            ('\x1bOA', curses.KEY_UP), ('\x1bOB', curses.KEY_DOWN),
+            ('\x1bOC', curses.KEY_RIGHT), ('\x1bOD', curses.KEY_LEFT),
+            ('\x1b[5~', curses.KEY_PPAGE), ('\x1b[6~', curses.KEY_NPAGE))
+    max_gap = 4 # unchanged cells rewritten rather than jumped over
+
+    def __init__(self, fd_in=0, fd_out=1):
+        try:
+            lines, columns = struct.unpack('hh', fcntl.ioctl(
+                    fd_out, termios.TIOCGWINSZ, b'\0' * 4))
+        except IOError:
+            lines, columns = 24, 80
+        super(AnsiWindow, self).__init__(lines, columns)
+        self.fd_in, self.fd_out = fd_in, fd_out
+        self.shown = [[self.blank] * columns for y_cursor in range(lines)]
+        self.pending = ['\x1b[0m\x1b[2J']
+        self.attribute = curses.A_NORMAL
+        self.position = None # terminal cursor, None if unknown
+        self.shown_visibility = None
+        self.saved = None
+        self.buffer = b''
+        self.frames = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Switch terminal to unbuffered input and the alternate screen.
+
+        The alternate screen is cleared, so that after a stop() everything is
+        drawn again.
+
+        >>> import pty
+        >>> window = AnsiWindow(fd_in=pty.openpty()[1], fd_out=os.pipe()[1])
+        >>> window.addstr(0, 0, 'spam')
+        >>> window.refresh()
+        >>> window.stop()
+        >>> window.start()
+        >>> window.changes()
+        '\\x1b[0m\\x1b[2J\\x1b[1;1Hspam\\x1b[?25h'
+        >>> window.stop()
+        """
+        self.saved = termios.tcgetattr(self.fd_in)
+        tty.setcbreak(self.fd_in)
+        os.write(self.fd_out, b'\x1b[?1049h')
+        self.shown = [[self.blank] * self.columns for y_cursor in range(self.lines)]
+        if self.pending[-1:] != ['\x1b[0m\x1b[2J']:
+            self.pending.append('\x1b[0m\x1b[2J')
+        self.attribute = curses.A_NORMAL
+        self.position = None
+
+    def stop(self):
+        """Restore terminal settings saved by start()."""
+        if self.saved is not None:
+            os.write(self.fd_out, b'\x1b[0m\x1b[?25h\x1b[?1049l')
+            termios.tcsetattr(self.fd_in, termios.TCSADRAIN, self.saved)
+            self.saved = None
+            self.shown_visibility = None
+
+    def clear(self):
+        super(AnsiWindow, self).clear()
+        self.shown = [[self.blank] * self.columns for y_cursor in range(self.lines)]
+        self.pending.append('\x1b[0m\x1b[2J')
+        self.attribute = curses.A_NORMAL
+
+    def scroll(self, lines=1):
+        super(AnsiWindow, self).scroll(lines)
+        top, bottom = self.region
+        shift(self.shown, top, bottom, lines, [self.blank] * self.columns)
+        # Line feeds at the bottom or reverse index at the top of the region
+        self.pending.append('\x1b[0m\x1b[{};{}r\x1b[{};1H{}\x1b[r'.format(
+                top + 1, bottom + 1, bottom + 1 if lines > 0 else top + 1,
+                '\n' * lines if lines > 0 else '\x1bM' * -lines))
+        self.attribute = curses.A_NORMAL
+        self.position = None
+
+    def changes(self):
+        """Escape sequences turning what the terminal shows into the cells."""
+        output = self.pending
+        self.pending = []
+        for y_cursor, (line, shown) in enumerate(zip(self.composite(), self.shown)):
+            if line == shown:
+                continue
+            for x_cursor, cell in enumerate(line):
+                if cell == shown[x_cursor]:
+                    continue
+                if self.position != (y_cursor, x_cursor):
+                    gap = line[self.position[1]:x_cursor] \
+                            if self.position and self.position[0] == y_cursor \
+                            and 0 < x_cursor - self.position[1] <= self.max_gap \
+                            else None
+                    if gap and all(attribute == self.attribute
+                                   for char, attribute in gap):
+                        output.extend(char for char, attribute in gap)
+                    else:
+                        output.append('\x1b[{};{}H'.format(y_cursor + 1,
+                                                           x_cursor + 1))
+                char, attribute = cell
+                if attribute != self.attribute:
+                    output.append(ansi_attribute(attribute))
+                    self.attribute = attribute
+                output.append(char)
+                shown[x_cursor] = cell
+                # Cursor stays put after writing the last column
+                self.position = (y_cursor, x_cursor + 1) \
+                        if x_cursor + 1 < self.columns else None
+        if self.visibility != self.shown_visibility:
+            output.append('\x1b[?25h' if self.visibility else '\x1b[?25l')
+            self.shown_visibility = self.visibility
+        if self.visibility and self.position != self.cursor:
+            output.append('\x1b[{};{}H'.format(self.cursor[0] + 1,
+                                               self.cursor[1] + 1))
+            self.position = self.cursor
+        return ''.join(output).encode('utf-8')
+
+    def refresh(self):
+        """Write all changes since the last refresh to the terminal at once."""
+        if self.saved is None:
+            self.start()
+        output = self.changes()
+        if output:
+            self.frames += 1
+            self.bytes_written += len(output)
+            while output:
+                output = output[os.write(self.fd_out, output):]
+
+    def read_key(self):
+        """Read a keystroke, translating escape sequences of special keys."""
+        if not self.buffer:
+            delay = None if self.delay < 0 else self.delay / 1000
+            if not select.select([self.fd_in], [], [], delay)[0]:
+                return -1
+            self.buffer = os.read(self.fd_in, 1024)
+        if self.buffer == b'\x1b' and select.select([self.fd_in], [], [], 0.025)[0]:
+            self.buffer += os.read(self.fd_in, 1024)
+        for sequence, keystroke in self.keys:
+            if self.buffer.startswith(sequence.encode('ascii')):
+                self.buffer = self.buffer[len(sequence):]
+                return keystroke
+        keystroke, self.buffer = ord(self.buffer[:1]), self.buffer[1:]
+        return keystroke
+
+
+class VirtualScreen(Window):
+    """Headless Window recording what is drawn, for tests and profiling.
+
+    Counts calls to addstr(), the bytes of text they write and refreshes, so
+    the cost of rendering can be measured without a terminal. Keystrokes are
+    only those pushed back with ungetch(); drive run() with its keystrokes
+    parameter instead.
+
+    >>> stdscr = VirtualScreen(2, 8)
+    >>> stdscr.addstr(0, 0, 'spam…')
+    >>> stdscr.refresh()
+    >>> stdscr.writes, stdscr.bytes, stdscr.refreshes
+    (1, 7, 1)
+    >>> stdscr.text()[0]
+    u'spam\\u2026   '
+
+    :param lines: number of lines
+    :type lines: int
+    :param columns: number of columns
+    :type columns: int
+    """
+
+    def __init__(self, lines=24, columns=80):
+        super(VirtualScreen, self).__init__(lines, columns)
+        self.reset_counts()
+
+    def reset_counts(self):
+        """Start counting writes, bytes and refreshes from zero."""
+        self.writes = 0
+        self.bytes = 0
+        self.refreshes = 0
+
+    def addstr(self, *args):
+        text = args[2] if isinstance(args[0], numbers.Integral) else args[0]
+        self.writes += 1
+        self.bytes += len(text if isinstance(text, bytes) else text.encode('utf-8'))
+        super(VirtualScreen, self).addstr(*args)
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+def cursor_visibility(stdscr, visibility):
+    """Set cursor visibility of a curses screen or a Window.
+
+    :param stdscr: window object being drawn to
+    :type stdscr: curses.window or Window
+    :param visibility: 0 for invisible, 1 for visible
+    :type visibility: int
+    """
+    if isinstance(stdscr, Window):
+        stdscr.curs_set(visibility)
+    else:
+        curses.curs_set(visibility)
+
+
 def format_line(text, width):
     """Pad or truncate text to fit width.
 
@@ -63,6 +570,281 @@ def format_line(text, width):
     return result.encode('utf-8')
 
 
+def stringify(series):
+    """Convert each value in a Series to unicode as unicode() would.
+
+    Integer, boolean, float and datetime columns are converted by NumPy in a
+    single call. Other columns, including datetimes with a time zone, fall
+    back to converting each value.
+
+    >>> stringify(pd.Series([1, 2, 30])).tolist()
+    [u'1', u'2', u'30']
+    >>> stringify(pd.Series([0.5, np.nan])).tolist()
+    [u'0.5', u'nan']
+    >>> stringify(pd.Series(pd.to_datetime(['2016-11-12 03:00', None]))).tolist()
+    [u'2016-11-12 03:00:00', u'NaT']
+    >>> eastern = pd.Series(pd.to_datetime(['2016-11-12 03:00', None]))
+    >>> eastern = eastern.dt.tz_localize('US/Eastern')
+    >>> stringify(eastern).tolist()
+    [u'2016-11-12 03:00:00-05:00', u'NaT']
+    >>> stringify(eastern).tolist() == [unicode(value) for value in eastern]
+    True
+    >>> stringify(pd.Series(['spam', None])).tolist()
+    [u'spam', u'None']
+
+    :param series: values to convert
+    :type series: pandas.Series
+    :returns: unicode representation of each value
+    :rtype: numpy.ndarray
+    """
+    values = series.values
+    kind = series.dtype.kind
+    if kind in 'iubf':
+        return values.astype(np.unicode_)
+    elif kind == 'M' and not is_datetime64tz_dtype(series) and \
+            not (values[~np.isnat(values)].astype(np.int64) % 10**9).any():
+        # Timestamps without fractional seconds
+        texts = np.datetime_as_string(values, unit='s').astype(np.unicode_)
+        return np.where(np.isnat(values), 'NaT', np.char.replace(texts, 'T', ' '))
+    else:
+        return np.array([unicode(value) for value in series.astype(object)],
+                        dtype=np.unicode_)
+
+
+def format_column(texts, width):
+    """Pad or truncate each string in an array to fit width.
+
+    Vectorized equivalent of calling format_line() on each string.
+
+    >>> format_column(np.array(['lorem ipsum', 'lorem']), 8)
+    ['lorem \\xe2\\x80\\xa6 ', 'lorem   ']
+    >>> format_column(np.array(['lorem ipsum', '']), 2)
+    ['\\xe2\\x80\\xa6 ', '  ']
+    >>> format_column(np.array(['lorem ipsum', '']), 1)
+    [' ', ' ']
+
+    :param texts: contents of cells
+    :type texts: numpy.ndarray of unicode
+    :param width: width of cells
+    :type width: int
+    :returns: encoded unicode strings formatted to fit in width
+    :rtype: list of str
+    """
+    if width <= 1:
+        return [b' ' * width] * texts.size
+    fits = np.char.str_len(texts) < width
+    truncated = texts.astype('U{}'.format(width - 2)) if width > 2 else \
+            np.full(texts.size, '', dtype='U1')
+    result = np.where(fits, np.char.ljust(texts, width),
+                      np.char.add(truncated, '… '))
+    return [text.encode('utf-8') for text in result.tolist()]
+
+
+def format_block(df, rows, cols, widths):
+    """Format a rectangular block of a DataFrame to fit column widths.
+
+    The block is pulled out of the DataFrame with a single slice and each of
+    its columns is formatted as a whole.
+
+    >>> format_block(pd.DataFrame([[1, 'spam'], [2.5, 'eggs']]), [0, 1], [1], [3])
+    [['s\\xe2\\x80\\xa6 ', 'e\\xe2\\x80\\xa6 ']]
+
+    :param df: underlying data to present
+    :type df: pandas.DataFrame
+    :param rows: row positions in block
+    :type rows: list of int
+    :param cols: column positions in block
+    :type cols: list of int
+    :param widths: width of each column in block
+    :type widths: list of int
+    :returns: formatted text of each column in block
+    :rtype: list of list of str
+    """
+    block = df.iloc[rows, cols]
+    return [format_column(stringify(block.iloc[:, i]), width)
+            for i, width in enumerate(widths)]
+
+
+class View(object):
+    """Rows and columns of a DataFrame in some order, without copying them.
+
+    A view holds the DataFrame and the positions of its rows and columns in
+    it, or None for all of them in order. Taking rows or columns of a view
+    only composes positions, so sorting costs an array of integers. Data is
+    only pulled out of the DataFrame with iloc, as it is drawn, searched or
+    passed to commands, and frame() copies all of it.
+
+    >>> view = View(pd.DataFrame({'a': [3, 1, 2], 'b': ['x', 'y', 'z']}))
+    >>> view = view.take([1, 2, 0]).take([1, 0], axis=1)
+    >>> view.shape, view.columns.tolist(), view.index.tolist()
+    ((3, 2), [u'b', u'a'], [1, 2, 0])
+    >>> view.iloc[1:, 1].tolist()
+    [2, 3]
+    >>> view.take([2, 1]).frame()
+       b  a
+    0  x  3
+    2  z  2
+
+    :param df: underlying data, or another view of it
+    :type df: pandas.DataFrame or View
+    :param rows: positions of rows in df, or None for all in order
+    :type rows: numpy.ndarray of int
+    :param cols: positions of columns in df, or None for all in order
+    :type cols: numpy.ndarray of int
+    """
+
+    def __init__(self, df, rows=None, cols=None):
+        if isinstance(df, View):
+            rows = df.rows if rows is None else df.positions(0, rows)
+            cols = df.cols if cols is None else df.positions(1, cols)
+            df = df.df
+        self.df = df
+        self.rows = None if rows is None else np.asarray(rows)
+        self.cols = None if cols is None else np.asarray(cols)
+        self.shape = (df.shape[0] if rows is None else len(self.rows),
+                      df.shape[1] if cols is None else len(self.cols))
+        self.size = self.shape[0] * self.shape[1]
+        self.iloc = ViewIndexer(self)
+        self._index, self._columns, self._dtypes = None, None, None
+
+    def positions(self, axis, key):
+        """Translate positions along an axis of the view to positions in df."""
+        positions = self.cols if axis else self.rows
+        return key if positions is None else positions[key]
+
+    def take(self, indices, axis=0):
+        """Return a view of some rows or columns, as DataFrame.take() would.
+
+        :param indices: positions of rows or columns in this view
+        :type indices: numpy.ndarray of int
+        :param axis: 0 to take rows and 1 to take columns
+        :type axis: int
+        :rtype: View
+        """
+        return View(self, None if axis else indices, indices if axis else None)
+
+    def frame(self):
+        """Copy the rows and columns of the view into a new DataFrame."""
+        return self.df.iloc[slice(None) if self.rows is None else self.rows,
+                            slice(None) if self.cols is None else self.cols]
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self.df.index if self.rows is None else \
+                    self.df.index.take(self.rows)
+        return self._index
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = self.df.columns if self.cols is None else \
+                    self.df.columns.take(self.cols)
+        return self._columns
+
+    @property
+    def dtypes(self):
+        if self._dtypes is None:
+            self._dtypes = self.df.dtypes if self.cols is None else \
+                    self.df.dtypes.take(self.cols)
+        return self._dtypes
+
+
+class ViewIndexer(object):
+    """Pull data out of a View by position, as DataFrame.iloc does."""
+
+    def __init__(self, view):
+        self.view = view
+
+    def __getitem__(self, key):
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        return self.view.df.iloc[self.view.positions(0, rows),
+                                 self.view.positions(1, cols)]
+
+
+class CellCache(object):
+    """Bounded LRU cache of formatted cell text.
+
+    Entries are keyed by row position, column position, width and the version
+    of the data. Bump the version with invalidate() whenever the contents of
+    the DataFrame change position (sorting) or are replaced (commands).
+
+    >>> cache = CellCache(max_bytes=1024)
+    >>> df = pd.DataFrame([[1, 'spam'], [2.5, 'eggs']])
+    >>> cache.format_block(df, [0, 1], [1], [6])
+    [['spam  ', 'eggs  ']]
+    >>> cache.format_block(df, [1], [1], [6])
+    [['eggs  ']]
+    >>> cache.hits, cache.misses
+    (1, 2)
+    >>> cache.invalidate()
+    >>> cache.version, len(cache.entries), cache.used_bytes
+    (1, 0, 0)
+
+    :param max_bytes: approximate memory budget for cached text
+    :type max_bytes: int
+    """
+
+    entry_overhead = 200 # approximate bytes used by key and bookkeeping
+
+    def __init__(self, max_bytes=2**24):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Discard all entries because the data has changed."""
+        self.entries.clear()
+        self.used_bytes = 0
+        self.version += 1
+
+    def get(self, row, col, width):
+        """Return cached text or None, marking the entry as recently used."""
+        key = row, col, width, self.version
+        text = self.entries.pop(key, None)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[key] = text
+        return text
+
+    def put(self, row, col, width, text):
+        """Store text, evicting least recently used entries over budget."""
+        key = row, col, width, self.version
+        if key in self.entries:
+            return
+        self.entries[key] = text
+        self.used_bytes += len(text) + self.entry_overhead
+        while self.used_bytes > self.max_bytes and self.entries:
+            old_key, old_text = self.entries.popitem(last=False)
+            self.used_bytes -= len(old_text) + self.entry_overhead
+
+    def format_block(self, df, rows, cols, widths):
+        """Cached equivalent of format_block().
+
+        Cells not found in the cache are formatted with a single call to
+        format_block() covering the rows and columns which have misses.
+        """
+        block = [[self.get(row, col, width) for row in rows]
+                 for col, width in zip(cols, widths)]
+        missing_rows = [i for i, row in enumerate(rows)
+                        if any(texts[i] is None for texts in block)]
+        missing_cols = [j for j, texts in enumerate(block) if None in texts]
+        if missing_cols:
+            formatted = format_block(df, [rows[i] for i in missing_rows],
+                                     [cols[j] for j in missing_cols],
+                                     [widths[j] for j in missing_cols])
+            for j, texts in zip(missing_cols, formatted):
+                for i, text in zip(missing_rows, texts):
+                    block[j][i] = text
+                    self.put(rows[i], cols[j], widths[j], text)
+        return block
+
+
 def screen(start, end, cum_extents, offset):
     """Generate column widths or row heights from screen start to end positions.
 
@@ -144,14 +926,432 @@ def origin(current, start, end, cum_extents, screen, moving):
         return current
 
 
+class Frame(object):
+    """Record of what was painted on screen by the last call to draw().
+
+    Cells are keyed by their screen position and hold the text and attribute
+    last written there. The state of the view (origin, selection box, found
+    cell and extents) is also kept so that a frame which would look exactly
+    like the previous one is skipped altogether.
+
+    >>> frame = Frame()
+    >>> frame.update(VirtualScreen(), {(0, 0): ('spam', curses.A_NORMAL)})
+    1
+    >>> frame.update(VirtualScreen(), {(0, 0): ('spam', curses.A_NORMAL)})
+    0
+    >>> frame.invalidate()
+    >>> frame.cells
+    {}
+    """
+
+    def __init__(self):
+        self.cells = {}
+        self.state = None
+        self.sources = ()
+        self.label_cache = None, {}
+
+    def invalidate(self):
+        """Forget painted contents so that the next frame is drawn in full."""
+        self.cells = {}
+        self.state = None
+
+    def update(self, stdscr, cells):
+        """Write cells which differ from the previous frame.
+
+        :param stdscr: window object to update
+        :type stdscr: curses.window
+        :param cells: text and attribute to draw at each screen position
+        :type cells: dict
+        :returns: number of cells written
+        :rtype: int
+        """
+        writes = 0
+        for (y_cursor, x_cursor), (text, attribute) in cells.items():
+            if self.cells.get((y_cursor, x_cursor)) != (text, attribute):
+                stdscr.addstr(y_cursor, x_cursor, text, attribute)
+                writes += 1
+        self.cells = cells
+        return writes
+
+    def labels(self, df):
+        """Return a function formatting header and index labels for one frame.
+
+        Labels formatted for the previous frame of the same DataFrame are
+        reused, and only labels shown in this frame are kept for the next one.
+
+        >>> labels = Frame().labels(pd.DataFrame({'spam': [1, 2]}))
+        >>> labels('columns', 0, 6)
+        'spam  '
+        >>> labels('index', 1, 3)
+        '1  '
+
+        :param df: underlying data to present
+        :type df: pandas.DataFrame
+        :returns: function of axis name, position and width
+        :rtype: function
+        """
+        source, previous = self.label_cache
+        previous = previous if source is df else {}
+        current = {}
+        self.label_cache = df, current
+        def label(axis, position, width):
+            key = axis, position, width
+            if key not in current:
+                current[key] = previous[key] if key in previous else \
+                        format_line(getattr(df, axis)[position], width)
+            return current[key]
+        return label
+
+    def unchanged(self, state, *sources):
+        """Check if view state matches the previous frame and remember it.
+
+        Sources such as the DataFrame or cumulative extents are compared by
+        identity since they are replaced, never mutated, when they change.
+
+        :param state: hashable description of the view
+        :type state: tuple
+        :returns: True if nothing needs to be drawn
+        :rtype: bool
+        """
+        if self.state == state and self.same_sources(sources):
+            return True
+        self.state, self.sources = state, sources
+        return False
+
+    def same_sources(self, sources):
+        """Check if sources are the very objects drawn in the previous frame."""
+        return self.state is not None and all(
+                new is old for new, old in zip(sources, self.sources))
+
+    def vertical_shift(self, layout, origin_y, *sources):
+        """Lines the view moved vertically since the previous frame.
+
+        :param layout: description of everything but the vertical origin
+        :type layout: tuple
+        :param origin_y: new vertical origin
+        :type origin_y: int
+        :returns: zero unless only the vertical origin changed
+        :rtype: int
+        """
+        if self.state is None or self.state[0] != layout or \
+                not self.same_sources(sources):
+            return 0
+        return origin_y - self.state[1]
+
+    def scroll(self, stdscr, first, last, lines):
+        """Scroll painted lines first to last using the terminal.
+
+        Lines moving out of the region are forgotten and lines exposed by the
+        scroll are left blank so that the next update paints only those.
+
+        >>> frame = Frame()
+        >>> frame.cells = {(0, 0): ('a', 0), (1, 0): ('b', 0), (2, 0): ('c', 0)}
+        >>> frame.scroll(VirtualScreen(), 1, 2, 1)
+        >>> sorted(frame.cells)
+        [(0, 0), (1, 0)]
+        >>> frame.cells[1, 0] == ('c', 0)
+        True
+
+        :param stdscr: window object to update
+        :type stdscr: curses.window
+        :param first: first line of scrolling region
+        :type first: int
+        :param last: last line of scrolling region
+        :type last: int
+        :param lines: number of lines to scroll up (down if negative)
+        :type lines: int
+        """
+        stdscr.idlok(True)
+        stdscr.scrollok(True)
+        stdscr.setscrreg(first, last)
+        stdscr.scroll(lines)
+        stdscr.setscrreg(0, stdscr.getmaxyx()[0] - 1)
+        stdscr.scrollok(False)
+        cells = {}
+        for (y_cursor, x_cursor), cell in self.cells.items():
+            if not first <= y_cursor <= last:
+                cells[y_cursor, x_cursor] = cell
+            elif first <= y_cursor - lines <= last:
+                cells[y_cursor - lines, x_cursor] = cell
+        self.cells = cells
+
+
+def column_bands(cum_widths, band_width):
+    """Split columns into bands of whole columns about band_width wide.
+
+    A column wider than band_width gets a band of its own.
+
+    >>> column_bands(np.array([0, 4, 8, 12, 16, 36, 40]), 10)
+    array([0, 2, 4, 5])
+
+    :param cum_widths: cumulative sum of column widths
+    :type cum_widths: numpy.ndarray
+    :param band_width: maximum width of a band
+    :type band_width: int
+    :returns: first column of each band
+    :rtype: numpy.ndarray
+    """
+    starts = [0]
+    for col in range(1, cum_widths.size - 1):
+        if cum_widths[col+1] - cum_widths[starts[-1]] > band_width:
+            starts.append(col)
+    return np.array(starts)
+
+
+class TileCache(object):
+    """DataFrame contents pre-rendered into curses pads.
+
+    Contents are split into tiles of tile_rows rows by a band of whole columns
+    about band_width wide, each held in its own pad. Drawing the view then
+    amounts to copying the visible part of each pad onto the screen and
+    highlighting the selection on top. Text for tiles next to the viewport is
+    formatted on a background thread so that it is ready when scrolled to,
+    and the least recently used pads are evicted beyond max_bytes.
+
+    >>> stdscr, tiles = VirtualScreen(4, 18), TileCache(tile_rows=2, band_width=10)
+    >>> tiles.sync(pd.DataFrame([[1, 2, 3], [4, 5, 6], [7, 8, 9]]),
+    ...            np.append(np.array([0]), np.full(3, 6).cumsum()), stdscr)
+    >>> tiles.draw({(0, 1): curses.A_REVERSE}, 0, 0, 10, 0, 10, 1, 8)
+    >>> sorted(tiles.tiles)
+    [(0, 0), (0, 1), (1, 0), (1, 1)]
+    >>> stdscr.text()[1:]
+    [u'        1     2   ', u'        4     5   ', u'        7     8   ']
+    >>> tiles.close()
+
+    :param tile_rows: number of rows in each tile
+    :type tile_rows: int
+    :param band_width: approximate width of each tile
+    :type band_width: int
+    :param max_bytes: approximate memory budget for pads
+    :type max_bytes: int
+    """
+
+    cell_bytes = 32 # approximate memory used by a pad for each character cell
+
+    def __init__(self, tile_rows=256, band_width=256, max_bytes=2**27):
+        self.tile_rows = tile_rows
+        self.band_width = band_width
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict() # (tile row, band) -> (pad, highlighted cells)
+        self.used_bytes = 0
+        self.sources = None, None
+        self.window = None # window pads are copied onto, None for curses
+        self.band_starts = np.array([0])
+        # Shared with the worker thread
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.prefetched = {}
+        self.requested = set()
+        self.jobs = Queue()
+        self.worker = None
+
+    @staticmethod
+    def usable(cum_heights):
+        """Check that every row is one line high, as tiles assume."""
+        return cum_heights[-1] == cum_heights.size - 1
+
+    def sync(self, df, cum_widths, stdscr=None):
+        """Discard tiles rendered from another DataFrame or other widths, or
+        for another window.
+
+        :param df: underlying data to present
+        :type df: pandas.DataFrame
+        :param cum_widths: cumulative sum of column widths
+        :type cum_widths: numpy.ndarray
+        :param stdscr: window to draw tiles on
+        :type stdscr: curses.window or Window
+        """
+        window = stdscr if isinstance(stdscr, Window) else None
+        if self.sources[0] is df and self.sources[1] is cum_widths and \
+                self.window is window:
+            return
+        self.window = window
+        with self.lock:
+            self.generation += 1
+            self.prefetched.clear()
+            self.requested.clear()
+        self.tiles.clear()
+        self.used_bytes = 0
+        self.sources = df, cum_widths
+        self.band_starts = column_bands(cum_widths, self.band_width)
+
+    def extent(self, key):
+        """Rows, columns and column widths covered by a tile."""
+        df, cum_widths = self.sources
+        tile_row, band = key
+        first_row = tile_row * self.tile_rows
+        rows = list(range(first_row, min(first_row + self.tile_rows, df.shape[0])))
+        end_col = self.band_starts[band+1] if band + 1 < self.band_starts.size \
+                else cum_widths.size - 1
+        cols = list(range(self.band_starts[band], end_col))
+        widths = [cum_widths[col+1] - cum_widths[col] for col in cols]
+        return rows, cols, widths
+
+    def tile(self, key):
+        """Return pad and highlighted cells of a tile, rendering it if needed."""
+        if key in self.tiles:
+            self.tiles[key] = self.tiles.pop(key)
+            return self.tiles[key]
+        rows, cols, widths = self.extent(key)
+        with self.lock:
+            block = self.prefetched.pop(key, None)
+        if block is None:
+            block = format_block(self.sources[0], rows, cols, widths)
+        # One spare column so that writing the last cell never fails
+        newpad = curses.newpad if self.window is None else self.window.newpad
+        pad = newpad(len(rows), sum(widths) + 1)
+        x_cursor = 0
+        for width, texts in zip(widths, block):
+            for y_cursor, text in enumerate(texts):
+                pad.addstr(y_cursor, x_cursor, text)
+            x_cursor += width
+        self.tiles[key] = pad, {}
+        self.used_bytes += len(rows) * (sum(widths) + 1) * self.cell_bytes
+        return self.tiles[key]
+
+    def evict(self, keep):
+        """Drop least recently used tiles over budget, except those in keep."""
+        for key in list(self.tiles):
+            if self.used_bytes <= self.max_bytes:
+                break
+            if key not in keep:
+                pad, highlighted = self.tiles.pop(key)
+                height, width = pad.getmaxyx()
+                self.used_bytes -= height * width * self.cell_bytes
+
+    def prefetch(self, keys):
+        """Format text of tiles in the background, forgetting other prefetches.
+
+        :param keys: tiles likely to be needed soon
+        :type keys: list of tuple
+        """
+        tile_rows = (self.sources[0].shape[0] - 1) // self.tile_rows + 1
+        keys = [(tile_row, band) for tile_row, band in keys
+                if 0 <= tile_row < tile_rows and 0 <= band < self.band_starts.size
+                and (tile_row, band) not in self.tiles]
+        with self.lock:
+            for key in list(self.prefetched):
+                if key not in keys:
+                    del self.prefetched[key]
+            for key in keys:
+                if key not in self.prefetched and key not in self.requested:
+                    self.requested.add(key)
+                    self.jobs.put((self.generation, key, self.sources[0],
+                                   self.extent(key)))
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work)
+            self.worker.daemon = True
+            self.worker.start()
+
+    def close(self):
+        """Stop the background thread, waiting for its current tile."""
+        if self.worker is not None:
+            with self.lock:
+                self.generation += 1
+            self.jobs.put(None)
+            self.worker.join()
+            self.worker = None
+
+    def work(self):
+        """Format prefetched tiles until closed."""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            generation, key, df, (rows, cols, widths) = job
+            block = format_block(df, rows, cols, widths) \
+                    if generation == self.generation else None
+            with self.lock:
+                if generation == self.generation:
+                    self.requested.discard(key)
+                    self.prefetched[key] = block
+
+    def draw(self, highlights, origin_y, origin_x, unfrozen_y, start_x,
+             end_x, frozen_y, frozen_x):
+        """Copy visible parts of tiles to the virtual screen.
+
+        Call curses.doupdate(), or refresh() the Window, afterwards to show
+        them.
+
+        :param highlights: attribute of each visible cell not drawn normally
+        :type highlights: dict
+        :param origin_y: y coordinate of topmost part of view box
+        :type origin_y: int
+        :param origin_x: x coordinate of leftmost part of view box
+        :type origin_x: int
+        :param unfrozen_y: number of rows dedicated to contents of view box
+        :type unfrozen_y: int
+        :param start_x: x coordinate of leftmost part of tiles to copy
+        :type start_x: int
+        :param end_x: x coordinate after rightmost part of tiles to copy
+        :type end_x: int
+        :param frozen_y: initial row offset before view box contents are shown
+        :type frozen_y: int
+        :param frozen_x: initial column offset before view box contents are shown
+        :type frozen_x: int
+        """
+        df, cum_widths = self.sources
+        end_y = min(origin_y + unfrozen_y, df.shape[0])
+        if end_y <= origin_y or end_x <= start_x:
+            return
+        band_x = cum_widths[self.band_starts]
+        bands = range(np.searchsorted(band_x, start_x, side='right') - 1,
+                      np.searchsorted(band_x, end_x - 1, side='right'))
+        tile_rows = range(origin_y // self.tile_rows,
+                          (end_y - 1) // self.tile_rows + 1)
+        visible = [(tile_row, band) for tile_row in tile_rows for band in bands]
+        band_of = np.searchsorted(self.band_starts, range(cum_widths.size - 1),
+                                  side='right') - 1
+        for key in visible:
+            tile_row, band = key
+            pad, highlighted = self.tile(key)
+            # Move highlighted cells of this tile
+            first_row = tile_row * self.tile_rows
+            first_x = band_x[band]
+            wanted = dict(((row, col), attribute)
+                          for (row, col), attribute in highlights.items()
+                          if row // self.tile_rows == tile_row
+                          and band_of[col] == band)
+            for (row, col), attribute in list(highlighted.items()):
+                if wanted.get((row, col)) != attribute:
+                    pad.chgat(row - first_row, cum_widths[col] - first_x,
+                              cum_widths[col+1] - cum_widths[col], curses.A_NORMAL)
+                    del highlighted[row, col]
+            for (row, col), attribute in wanted.items():
+                if highlighted.get((row, col)) != attribute:
+                    pad.chgat(row - first_row, cum_widths[col] - first_x,
+                              cum_widths[col+1] - cum_widths[col], attribute)
+                    highlighted[row, col] = attribute
+            # Copy intersection of tile and view box
+            top = max(origin_y, first_row)
+            bottom = min(end_y, first_row + pad.getmaxyx()[0])
+            left = max(start_x, first_x)
+            right = min(end_x, first_x + pad.getmaxyx()[1] - 1)
+            pad.touchwin()
+            pad.noutrefresh(top - first_row, left - first_x,
+                            frozen_y + top - origin_y, frozen_x + left - origin_x,
+                            frozen_y + bottom - 1 - origin_y,
+                            frozen_x + right - 1 - origin_x)
+        self.evict(visible)
+        self.prefetch([(tile_row + step, band) for tile_row in tile_rows
+                       for band in bands for step in (1, -1)] +
+                      [(tile_row, band + step) for tile_row in tile_rows
+                       for band in bands for step in (1, -1)])
+
+
 def draw(stdscr, df, frozen_y, frozen_x, unfrozen_y, unfrozen_x,
          origin_y, origin_x, left, right, top, bottom, found_row, found_col,
-         cum_widths, cum_heights, moving_right, moving_down, resizing):
+         cum_widths, cum_heights, moving_right, moving_down, resizing,
+         frame=None, cache=None, tiles=None, matches=None):
     """Refresh display with updated view.
 
-    Running line profiler shows this is the slowest part. Will optimize later. 
+    Only cells whose text or attribute differ from what is recorded in frame
+    are written to the screen. Pass the same frame on every call to benefit.
+    When the view only scrolled vertically by a few lines, the unfrozen lines
+    are scrolled by the terminal and only the exposed lines are painted.
+    If tiles are given, contents are copied from pre-rendered pads instead.
 
-    >>> draw(curses.initscr(),
+    >>> draw(VirtualScreen(),
     ...      pd.DataFrame([[1, 2, 3], [4, 5, 6], [7, 8, 9]]),
     ...      1, 8, 10, 10,
     ...      0, 0, 0, 1, 0, 1, 0, 1,
@@ -160,6 +1360,24 @@ def draw(stdscr, df, frozen_y, frozen_x, unfrozen_y, unfrozen_x,
     ...      False, False, True)
     (0, 0)
 
+    Moving the selection down one row rewrites only the cells of two rows:
+
+    >>> stdscr, frame = VirtualScreen(12, 48), Frame()
+    >>> df = pd.DataFrame(np.arange(400).reshape(100, 4))
+    >>> cum_widths = np.append(np.array([0]), np.full(4, 10).cumsum())
+    >>> cum_heights = np.append(np.array([0]), np.full(100, 1).cumsum())
+    >>> for row in range(2):
+    ...     stdscr.reset_counts()
+    ...     origin_y, origin_x = draw(stdscr, df, 1, 8, 10, 40, 0, 0,
+    ...                               0, 0, row, row, None, None,
+    ...                               cum_widths, cum_heights,
+    ...                               False, True, False, frame)
+    ...     print(stdscr.writes)
+    62
+    4
+    >>> sorted(set(type(text).__name__ for text, _ in frame.cells.values()))
+    ['str']
+
     :param stdscr: window object to update
     :type stdscr: curses.window
     :param df: underlying data to present
@@ -198,43 +1416,112 @@ def draw(stdscr, df, frozen_y, frozen_x, unfrozen_y, unfrozen_x,
     :type moving_down: bool
     :param resizing: flag if the selection is currently being resized
     :type resizing: bool
+    :param frame: contents painted by the previous call (updated in place)
+    :type frame: Frame
+    :param cache: formatted text of cells drawn in earlier frames
+    :type cache: CellCache
+    :param tiles: pre-rendered contents to draw from instead of cells
+    :type tiles: TileCache
+    :param matches: every cell matching the current search, highlighted
+    :type matches: Matches
+    :returns: new origin
+    :rtype: int, int
     """
-    curses.curs_set(0) # invisible cursor
+    frame = Frame() if frame is None else frame
+    cache = CellCache() if cache is None else cache
+    cursor_visibility(stdscr, 0)
     origin_x = origin(origin_x, left, right, cum_widths, unfrozen_x, moving_right)
     origin_y = origin(origin_y, top, bottom, cum_heights, unfrozen_y, moving_down)
-    for col, width, x_cursor in screen(origin_x, origin_x + unfrozen_x, cum_widths, frozen_x):
-        # Draw persistent header row
-        col_selected = left <= col <= right
-        col_attribute = curses.A_REVERSE if col_selected else curses.A_NORMAL
-        text = format_line(df.columns[col], width)
-        stdscr.addstr(0, x_cursor, text, col_attribute)
-        for row, height, y_cursor in screen(origin_y, origin_y + unfrozen_y, cum_heights, frozen_y):
-            # Draw persistent index column
-            row_selected = top <= row <= bottom
-            row_attribute = curses.A_REVERSE if row_selected else curses.A_NORMAL
-            text = format_line(df.index[row], frozen_x)
-            stdscr.addstr(y_cursor, 0, text, row_attribute)
-            # Draw DataFrame contents
-            if row == found_row and col == found_col:
-                attribute = curses.A_UNDERLINE
-            elif row == bottom and col == right and resizing:
-                attribute = curses.A_UNDERLINE
-            elif col_selected and row_selected:
-                attribute = curses.A_REVERSE
-            else:
-                attribute = curses.A_NORMAL
-            text = format_line(df.iat[row,col], width)
-            stdscr.addstr(y_cursor, x_cursor, text, attribute)
+    layout = (frozen_y, frozen_x, unfrozen_y, unfrozen_x, origin_x)
+    state = (layout, origin_y, left, right, top, bottom, found_row, found_col,
+             resizing, matches, None if matches is None else matches.searched)
+    lines = frame.vertical_shift(layout, origin_y, df, cum_widths, cum_heights)
+    if frame.unchanged(state, df, cum_widths, cum_heights):
+        return origin_y, origin_x
+    if tiles is not None and TileCache.usable(cum_heights):
+        tiles.sync(df, cum_widths, stdscr)
+    else:
+        tiles = None
+    if tiles is None and 0 < abs(lines) < unfrozen_y:
+        # Let the terminal move lines still on screen, paint only new ones
+        frame.scroll(stdscr, frozen_y, frozen_y + unfrozen_y - 1, lines)
+    columns = list(screen(origin_x, origin_x + unfrozen_x, cum_widths, frozen_x))
+    rows = list(screen(origin_y, origin_y + unfrozen_y, cum_heights, frozen_y))
+    labels = frame.labels(df)
+    matched = set() if matches is None else matches.visible(
+            [row for row, height, y_cursor in rows],
+            [col for col, width, x_cursor in columns])
+    cells = {}
+    # Draw persistent header row
+    for col, width, x_cursor in columns:
+        col_attribute = curses.A_REVERSE if left <= col <= right else curses.A_NORMAL
+        cells[0, x_cursor] = (labels('columns', col, width), col_attribute)
+    # Draw persistent index column
+    if frozen_x:
+        for row, height, y_cursor in rows:
+            row_attribute = curses.A_REVERSE if top <= row <= bottom else curses.A_NORMAL
+            cells[y_cursor, 0] = (labels('index', row, frozen_x), row_attribute)
+    # Draw DataFrame contents
+    def attribute(row, col):
+        highlight = curses.A_BOLD if (row, col) in matched else curses.A_NORMAL
+        if row == found_row and col == found_col:
+            return curses.A_UNDERLINE
+        elif row == bottom and col == right and resizing:
+            return curses.A_UNDERLINE
+        elif left <= col <= right and top <= row <= bottom:
+            return curses.A_REVERSE | highlight
+        else:
+            return highlight
+    if tiles is None:
+        clipped = columns
+    else:
+        # Tiles hold whole columns, columns cut by the screen edges are cells
+        clipped = [(col, width, x_cursor) for col, width, x_cursor in columns
+                   if width != cum_widths[col+1] - cum_widths[col]]
+        tiled = [col for col, width, x_cursor in columns
+                 if width == cum_widths[col+1] - cum_widths[col]]
+        highlights = {}
+        for col in tiled:
+            for row, height, y_cursor in rows:
+                if attribute(row, col) != curses.A_NORMAL:
+                    highlights[row, col] = attribute(row, col)
+    if clipped:
+        block = cache.format_block(df, [row for row, height, y_cursor in rows],
+                                   [col for col, width, x_cursor in clipped],
+                                   [width for col, width, x_cursor in clipped])
+        for (col, width, x_cursor), texts in zip(clipped, block):
+            for (row, height, y_cursor), text in zip(rows, texts):
+                cells[y_cursor, x_cursor] = (text, attribute(row, col))
     # Clear right margin if theres unused space on the right
+    col, width, x_cursor = columns[-1]
     margin = frozen_x + unfrozen_x - (x_cursor + width)
     if margin > 0:
         for y_cursor in range(frozen_y + unfrozen_y):
-            stdscr.addstr(y_cursor, x_cursor + width, ' ' * margin, curses.A_NORMAL)
+            cells[y_cursor, x_cursor + width] = (b' ' * margin, curses.A_NORMAL)
+    # Clear lines below the last row if the view is taller than what is left
+    row, height, y_cursor = rows[-1]
+    for y_cursor in range(y_cursor + height, frozen_y + unfrozen_y):
+        cells[y_cursor, 0] = (b' ' * (frozen_x + unfrozen_x), curses.A_NORMAL)
     # Clear frozen topleft corner
     for x_cursor in range(frozen_x):
         for y_cursor in range(frozen_y):
-            stdscr.addstr(y_cursor, x_cursor, ' ', curses.A_NORMAL)
-    stdscr.refresh()
+            cells[y_cursor, x_cursor] = (b' ', curses.A_NORMAL)
+    frame.update(stdscr, cells)
+    if tiles is None:
+        stdscr.refresh()
+    else:
+        # Tiles are copied over whatever the window holds underneath
+        stdscr.touchwin()
+        if not isinstance(stdscr, Window):
+            stdscr.noutrefresh()
+        if tiled:
+            tiles.draw(highlights, origin_y, origin_x, unfrozen_y,
+                       cum_widths[tiled[0]], cum_widths[tiled[-1]+1],
+                       frozen_y, frozen_x)
+        if isinstance(stdscr, Window):
+            stdscr.refresh()
+        else:
+            curses.doupdate()
     return origin_y, origin_x
 
 
@@ -335,6 +1622,37 @@ def number_in(keystroke_history):
         return int(number)
 
 
+def pending_input(stdscr, deadline):
+    """Check for keystrokes arriving before a deadline without consuming them.
+
+    >>> stdscr = VirtualScreen()
+    >>> pending_input(stdscr, time())
+    False
+    >>> stdscr.ungetch(ord('j'))
+    >>> pending_input(stdscr, time())
+    True
+    >>> stdscr.getch() == ord('j')
+    True
+
+    :param stdscr: window object reading input
+    :type stdscr: curses.window
+    :param deadline: time in seconds since the epoch to wait until
+    :type deadline: float
+    :returns: True if a keystroke is waiting to be read
+    :rtype: bool
+    """
+    stdscr.timeout(max(0, int(1000 * (deadline - time()))))
+    keypress = stdscr.getch()
+    stdscr.timeout(-1) # back to blocking reads
+    if keypress == -1:
+        return False
+    if isinstance(stdscr, Window):
+        stdscr.ungetch(keypress)
+    else:
+        curses.ungetch(keypress)
+    return True
+
+
 def expand_cumsum(start, end, cum_extents, amount):
     """Increase each extent by a given amount and update cumulative extents.
 
@@ -408,10 +1726,35 @@ def command_validator(keystroke):
         return keystroke
 
 
+def show_status(stdscr, status, row, width):
+    """Write a message on the status line and show it.
+
+    >>> stdscr = VirtualScreen(2, 12)
+    >>> show_status(stdscr, 'sorted in 0.1 s', 1, 12)
+    u'sorted in 0.1 s'
+    >>> stdscr.text()[1]
+    u'sorted in\\u2026  '
+
+    :param stdscr: window object to update
+    :type stdscr: curses.window
+    :param status: message to show
+    :type status: str
+    :param row: y position on screen of the status line
+    :type row: int
+    :param width: width of screen
+    :type width: int
+    :returns: status
+    :rtype: str
+    """
+    stdscr.addstr(row, 0, format_line(status, width - 1))
+    stdscr.refresh()
+    return status
+
+
 def show_prompt(stdscr, prompt, row, width, keystrokes=None, delay=0.0):
     """Display a prompt for a command on the bottom of the screen.
 
-    >>> show_prompt(curses.initscr(), '>', 0, 10, delay=0.1,
+    >>> show_prompt(VirtualScreen(), '>', 0, 10, delay=0.1,
     ...             keystrokes=(ord(k) for k in 'spam\\rham'))
     u'spam'
 
@@ -432,8 +1775,11 @@ def show_prompt(stdscr, prompt, row, width, keystrokes=None, delay=0.0):
     """
     stdscr.addstr(row, 0, prompt)
     stdscr.refresh()
-    curses.curs_set(1) # visible cursor
-    window = curses.newwin(1, width, row, len(prompt))
+    cursor_visibility(stdscr, 1)
+    if isinstance(stdscr, Window):
+        window, y_cursor, x_cursor = stdscr, row, len(prompt)
+    else:
+        window, y_cursor, x_cursor = curses.newwin(1, width, row, len(prompt)), 0, 0
     if keystrokes:
         string = ''
         for i, keystroke in enumerate(keystrokes):
@@ -442,16 +1788,803 @@ def show_prompt(stdscr, prompt, row, width, keystrokes=None, delay=0.0):
                 break
             else:
                 string += keystroke
-                window.addstr(0, i, keystroke)
+                window.addstr(y_cursor, x_cursor + i, keystroke)
                 window.refresh()
                 sleep(delay)
+    elif isinstance(stdscr, Window):
+        string = stdscr.edit(row, len(prompt), width)
     else:
         tb = curses.textpad.Textbox(window, insert_mode=True)
         string = tb.edit(command_validator)
     return string.strip()
 
 
-def next_match(df, string, row, col):
+# Characters unicode() can produce from each kind of NumPy dtype
+dtype_characters = {'b': 'aeflrstu', 'i': '-0123456789', 'u': '0123456789',
+                    'f': '+-.0123456789aefin'}
+
+number_pattern = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\Z')
+date_pattern = re.compile(r'\d{1,4}[-/]\d{1,2}')
+
+
+def interval(text):
+    """Parse a number or date as the closed interval of values it stands for.
+
+    A date stands for every time in its day, month or year, as nanoseconds.
+    Dates reaching outside pandas.Timestamp.min to max would overflow as
+    nanoseconds, so they are not taken as dates.
+
+    >>> interval('1e3')
+    (u'iuf', 1000.0, 1000.0)
+    >>> interval('2016-11-05')
+    (u'M', 1478304000000000000, 1478390399999999999)
+    >>> interval('spam') is None, interval('3000-01') is None
+    (True, True)
+
+    :param text: number or date
+    :type text: str
+    :returns: kinds of NumPy dtype the interval applies to and its lowest and
+        highest value, or None if text is neither
+    :rtype: str, float or int, float or int
+    """
+    if number_pattern.match(text):
+        value = float(text)
+        return 'iuf', value, value
+    if date_pattern.match(text):
+        try:
+            period = pd.Period(text)
+        except ValueError:
+            return None
+        if not pd.Period(pd.Timestamp.min, period.freq) < period < \
+                pd.Period(pd.Timestamp.max, period.freq):
+            return None
+        return 'M', period.start_time.value, period.end_time.value
+    return None
+
+
+def comparison(text):
+    """Parse a number, date or range of either to compare columns with.
+
+    Ranges are written as >x, >=x, <x, <=x or x..y, and include both ends.
+
+    >>> comparison('>1000')
+    (u'iuf', 1000.0, None, False, True)
+    >>> comparison('100..200')
+    (u'iuf', 100.0, 200.0, True, True)
+    >>> comparison('<2016-11')
+    (u'M', None, 1477958400000000000, True, False)
+    >>> comparison('spam') is None
+    True
+
+    :param text: query typed in the search bar
+    :type text: str
+    :returns: kinds of NumPy dtype compared, lowest and highest value or None
+        if unbounded and flags to include each, or None if not a comparison
+    :rtype: str, float or int, float or int, bool, bool
+    """
+    text = text.strip()
+    for op in ['>=', '<=', '>', '<']:
+        if text.startswith(op):
+            parsed = interval(text[len(op):].strip())
+            if parsed is None:
+                return None
+            kinds, low, high = parsed
+            return {'>=': (kinds, low, None, True, True),
+                    '>': (kinds, high, None, False, True),
+                    '<=': (kinds, None, high, True, True),
+                    '<': (kinds, None, low, True, False)}[op]
+    first, dots, last = text.partition('..')
+    if dots:
+        low, high = interval(first.strip()), interval(last.strip())
+        if low is None or high is None or low[0] != high[0]:
+            return None
+        return low[0], low[1], high[2], True, True
+    parsed = interval(text)
+    return None if parsed is None else parsed + (True, True)
+
+
+class Query(object):
+    """What to search for and how.
+
+    In the search bar, options may follow the string after a slash: r to
+    match a regular expression, c to match case, w to match whole cells and
+    s to search only the selected columns. Each combination is tested on a
+    list of texts at once. A trailing slash is dropped, so that a string
+    ending in a slash and letters can still be searched for as it is.
+
+    Unless it is a regular expression, a number, date or range of either as
+    parsed by comparison() is compared with the values of numeric or datetime
+    columns instead of their text. Other columns are still searched as text.
+
+    >>> query = Query.parse('Spam/cw', 2, 3)
+    >>> query.string, query.regex, query.case, query.whole, query.columns
+    (u'Spam', False, True, True, None)
+    >>> Query.parse('spam/s', 2, 3).columns, Query.parse('a/b/', 2, 3).string
+    ((2, 3), u'a/b')
+    >>> Query('sp').test(['spam', 'eggs'])
+    array([ True, False])
+    >>> Query('^s.a', regex=True).test(['spam', 'eggs'])
+    array([ True, False])
+    >>> Query('egg', whole=True).test(['egg', 'eggs'])
+    array([ True, False])
+    >>> Query('>=2').compares('i'), Query('>=2').compare(np.array([1, 2, 3]))
+    (True, array([False,  True,  True]))
+
+    :param string: string or regular expression to match
+    :type string: str
+    :param regex: flag to match string as a regular expression
+    :type regex: bool
+    :param case: flag to match case
+    :type case: bool
+    :param whole: flag to match whole cells only
+    :type whole: bool
+    :param columns: first and last column to search, or None for all
+    :type columns: tuple of int
+    """
+
+    options = 'rcws'
+
+    def __init__(self, string, regex=False, case=False, whole=False,
+                 columns=None):
+        self.string = string
+        self.regex = regex
+        self.case = case
+        self.whole = whole
+        self.columns = columns
+        self.key = string, regex, case, whole
+        self.needle = string if case else string.lower()
+        self.bounds = None if regex else comparison(string)
+        self.pattern = None
+        if regex:
+            # Texts are lowercase unless matching case
+            self.pattern = re.compile('(?:{})\\Z'.format(string) if whole else string,
+                                      re.UNICODE | (0 if case else re.IGNORECASE))
+
+    @classmethod
+    def parse(cls, text, left, right):
+        """Read a query typed in the search bar.
+
+        :param text: string followed by optional slash and options
+        :type text: str
+        :param left: leftmost column of selection
+        :type left: int
+        :param right: rightmost column of selection
+        :type right: int
+        :returns: query described by text
+        :rtype: Query
+        :raises re.error: if a regular expression is not valid
+        """
+        string, slash, options = text.rpartition('/')
+        if not slash or not set(options) <= set(cls.options):
+            string, options = text, ''
+        return cls(string, 'r' in options, 'c' in options, 'w' in options,
+                   (left, right) if 's' in options else None)
+
+    def searches(self, col):
+        """Check whether a column is searched."""
+        return self.columns is None or self.columns[0] <= col <= self.columns[1]
+
+    def compares(self, kind):
+        """Check whether values of a kind of NumPy dtype are compared."""
+        return self.bounds is not None and kind in self.bounds[0]
+
+    def compare(self, values):
+        """Flag values within the bounds of a comparison.
+
+        :param values: numeric or datetime values
+        :type values: numpy.ndarray
+        :returns: flag for each value
+        :rtype: numpy.ndarray of bool
+        """
+        _, low, high, low_closed, high_closed = self.bounds
+        found = np.ones(len(values), dtype=bool)
+        if values.dtype.kind == 'M':
+            values = values.view('i8')
+            found &= values != pd.NaT.value
+        elif values.dtype.kind == 'f':
+            # Compare at the precision values are stored in, as they are shown
+            low, high = [None if bound is None else values.dtype.type(bound)
+                         for bound in (low, high)]
+        with np.errstate(invalid='ignore'):
+            if low is not None:
+                found &= values >= low if low_closed else values > low
+            if high is not None:
+                found &= values <= high if high_closed else values < high
+        return found
+
+    def impossible(self, kind):
+        """Check whether no value of a kind of NumPy dtype can match."""
+        return self.pattern is None and kind in dtype_characters and \
+                not set(self.needle.lower()) <= set(dtype_characters[kind])
+
+    def test(self, texts):
+        """Flag matching texts, given in lowercase unless matching case.
+
+        :param texts: texts to match
+        :type texts: list of unicode
+        :returns: flag for each text
+        :rtype: numpy.ndarray of bool
+        """
+        needle = self.needle
+        if self.pattern is not None:
+            method = self.pattern.match if self.whole else self.pattern.search
+            return np.array([method(text) is not None for text in texts], dtype=bool)
+        elif self.whole:
+            return np.array([text == needle for text in texts], dtype=bool)
+        else:
+            return np.array([needle in text for text in texts], dtype=bool)
+
+
+def search_texts(series, casefold=True):
+    """Convert a Series to unicode for searching.
+
+    Integer, datetime and string columns are converted once per distinct
+    value, and each value is given the position of its text. Missing values
+    are converted one by one.
+
+    >>> search_texts(pd.Series(['Spam', None, 'eggs', 'spam', 'Spam']))
+    (array([0, 3, 1, 2, 0]), [u'spam', u'eggs', u'spam', u'none'])
+    >>> search_texts(pd.Series([1, 1.0, True]), casefold=False)
+    (None, [u'1', u'1.0', u'True'])
+    >>> eastern = pd.Series(pd.to_datetime(['2016-11-12 03:00']))
+    >>> search_texts(eastern.dt.tz_localize('US/Eastern'))
+    (array([0]), [u'2016-11-12 03:00:00-05:00'])
+
+    :param series: values to convert
+    :type series: pandas.Series
+    :param casefold: flag to convert texts to lowercase
+    :type casefold: bool
+    :returns: position of the text of each value, or None if the texts are
+        those of each value in order, and texts
+    :rtype: numpy.ndarray of int, list of unicode
+    """
+    kind = series.dtype.kind
+    if kind in 'iuMO':
+        # Factorizing the Series keeps the time zone of datetimes
+        codes, uniques = pd.factorize(series)
+        # Distinct values such as 1 and True may be equal as keys
+        if kind != 'O' or all(isinstance(value, basestring) for value in uniques):
+            texts = stringify(pd.Series(uniques)).tolist()
+            missing = np.flatnonzero(codes < 0)
+            codes[missing] = len(texts) + np.arange(missing.size)
+            texts += stringify(series.iloc[missing]).tolist()
+            return codes, [text.lower() for text in texts] if casefold else texts
+    texts = stringify(series).tolist()
+    return None, [text.lower() for text in texts] if casefold else texts
+
+
+def text_bytes(codes, texts):
+    """Approximate memory used by the result of search_texts().
+
+    >>> text_bytes(*search_texts(pd.Series(['spam', 'eggs', 'spam'])))
+    168
+
+    :param codes: position of the text of each value
+    :type codes: numpy.ndarray of int or None
+    :param texts: texts of values
+    :type texts: list of unicode
+    :returns: approximate number of bytes
+    :rtype: int
+    """
+    return (0 if codes is None else codes.nbytes) + \
+            4 * sum(map(len, texts)) + 56 * len(texts)
+
+
+def trigrams(text):
+    """Set of every three character substring of text.
+
+    >>> sorted(trigrams('spams'))
+    [u'ams', u'pam', u'spa']
+
+    :param text: text to split
+    :type text: unicode
+    :returns: distinct trigrams
+    :rtype: set of unicode
+    """
+    return set(text[i:i+3] for i in range(len(text) - 2))
+
+
+class TrigramIndex(object):
+    """Inverted index from trigrams to the texts containing them.
+
+    Any text containing a string of three or more characters contains each of
+    its trigrams, so intersecting their postings narrows the texts to search.
+
+    >>> index = TrigramIndex(['spam', 'eggs', 'spam and eggs', 'ham'])
+    >>> index.candidates('spam')
+    array([0, 2], dtype=int32)
+    >>> index.candidates('sam').size
+    0
+
+    :param texts: lowercase texts to index
+    :type texts: list of unicode
+    """
+
+    posting_overhead = 100 # approximate bytes used by key and array
+
+    def __init__(self, texts):
+        start = time()
+        postings = {}
+        for position, text in enumerate(texts):
+            for trigram in trigrams(text):
+                postings.setdefault(trigram, []).append(position)
+        self.postings = {trigram: np.array(positions, dtype=np.int32)
+                         for trigram, positions in postings.items()}
+        self.used_bytes = sum(positions.nbytes + self.posting_overhead
+                              for positions in self.postings.values())
+        self.build_seconds = time() - start
+
+    def candidates(self, string):
+        """Positions of texts which may contain string, in increasing order.
+
+        :param string: lowercase string of at least three characters
+        :type string: unicode
+        :returns: positions of texts containing every trigram of string
+        :rtype: numpy.ndarray of int
+        """
+        empty = np.array([], dtype=np.int32)
+        postings = sorted((self.postings.get(trigram, empty)
+                           for trigram in trigrams(string)), key=len)
+        positions = postings[0]
+        for other in postings[1:]:
+            if not positions.size:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+
+class SearchCache(object):
+    """Bounded cache of the text of whole columns for searching.
+
+    Columns are converted with search_texts() the first time they are searched
+    and kept until invalidate() is called because the data has changed (:
+    commands), or reordered with permute() when rows are sorted. Columns
+    which would exceed the memory budget, or which belong to any other
+    DataFrame, are not kept, and are converted again block by block on each
+    search instead. Columns are kept in lowercase, and as they are too once
+    searched matching case. The texts matching the last query are remembered
+    so that distinct values are only searched once per query.
+
+    With index set, string columns with at least index_texts distinct values
+    are also given a TrigramIndex, built on a background thread. Until it is
+    ready, the column is searched as if it had none.
+
+    With processes above one, DataFrames of at least parallel_cells cells are
+    searched by as many forked processes, each keeping its own cache of every
+    so many columns. Forked processes share the memory of the DataFrame with
+    this one copy on write: numbers are not copied, but reading objects
+    updates their reference counts, so each process ends up with its own copy
+    of the object columns it searches. Forking a process which runs other
+    threads is also prone to deadlocks, which is why this is off by default.
+    Sorting permutes their caches too, while any other change stops them
+    until the next search. If any process dies, all of them are stopped and
+    searches carry on in this process.
+
+    >>> cache = SearchCache()
+    >>> df = pd.DataFrame([['Spam', 1.5], ['eggs', 2.5], ['spam', 'x']])
+    >>> cache.match(df, 'SP', 1, 3)
+    array([[False, False],
+           [ True, False]])
+    >>> sorted(cache.columns), cache.used_bytes
+    ([(0, True), (1, True)], 436)
+    >>> cache.match(df, '5', 0, 3)[:, 1]
+    array([ True,  True, False])
+    >>> cache.permute(df.iloc[[2, 1, 0]], np.array([2, 1, 0]))
+    >>> cache.match(cache.source, 'sp', 0, 3)[:, 0]
+    array([ True, False,  True])
+    >>> cache.match(cache.source, Query('Spam', case=True, whole=True), 0, 3)
+    array([[False, False],
+           [False, False],
+           [ True, False]])
+    >>> eastern = pd.DataFrame({'t': pd.to_datetime(['2016-11-12 23:00'])})
+    >>> eastern['t'] = eastern['t'].dt.tz_localize('US/Eastern')
+    >>> SearchCache().match(eastern, '2016-11-12', 0, 1)
+    array([[ True]])
+    >>> cache.invalidate()
+    >>> cache.columns, cache.used_bytes
+    ({}, 0)
+
+    >>> cache = SearchCache(index=True, index_texts=2)
+    >>> cache.match(df, 'spa', 0, 3)[:, 0]
+    array([ True, False,  True])
+    >>> cache.close()
+    >>> cache.match(df, 'pam', 0, 3)[:, 0]
+    array([ True, False,  True])
+    >>> cache.stats()
+    u'search index: 1 column, 0.0 MiB, built in 0.00 s'
+
+    >>> cache = SearchCache(processes=2, parallel_cells=1)
+    >>> cache.match(df, 'a', 0, 3)
+    array([[ True, False],
+           [False, False],
+           [ True, False]])
+    >>> len(cache.pool)
+    2
+    >>> cache.pool[0][0].terminate()
+    >>> cache.match(df, 'a', 0, 3)[:, 0]
+    array([ True, False,  True])
+    >>> cache.pool, cache.processes
+    ([], 1)
+    >>> cache.close()
+
+    :param max_bytes: approximate memory budget for cached text
+    :type max_bytes: int
+    :param index: flag to index string columns by trigrams
+    :type index: bool
+    :param index_texts: fewest distinct values in a column worth indexing
+    :type index_texts: int
+    :param processes: number of processes to search with
+    :type processes: int
+    :param parallel_cells: fewest cells in a DataFrame worth searching with
+        more than one process
+    :type parallel_cells: int
+    """
+
+    def __init__(self, max_bytes=2**27, index=False, index_texts=2**12,
+                 processes=1, parallel_cells=2**20):
+        self.max_bytes = max_bytes
+        self.index = index
+        self.index_texts = index_texts
+        self.processes = processes
+        self.parallel_cells = parallel_cells
+        self.pool = [] # processes searching source and their connections
+        self.source = None # DataFrame columns are kept for
+        self.columns = {}
+        self.used_bytes = 0
+        self.query = None # key of the query texts were found for
+        self.found = {}
+        self.searching = threading.RLock() # held while matching on any thread
+        # Shared with the worker thread
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.indexes = {}
+        self.jobs = Queue()
+        self.worker = None
+
+    def invalidate(self, df=None):
+        """Discard all columns because the data has changed.
+
+        :param df: new data to keep columns for, or None for the next searched
+        :type df: pandas.DataFrame
+        """
+        with self.searching:
+            self.source = df
+            self.columns.clear()
+            self.used_bytes = 0
+            self.found.clear()
+            self.stop()
+        with self.lock:
+            self.generation += 1
+            self.indexes.clear()
+
+    def permute(self, df, order):
+        """Reorder kept columns after rows are sorted.
+
+        Distinct texts, their indexes and the texts matching the last search
+        string do not depend on the order of rows and are kept as they are.
+
+        :param df: sorted data to keep columns for
+        :type df: pandas.DataFrame
+        :param order: previous position of each row
+        :type order: numpy.ndarray of int
+        """
+        with self.searching:
+            self.source = df
+            for key, shadow in self.columns.items():
+                if shadow is not None:
+                    codes, texts = shadow
+                    self.columns[key] = (None, [texts[i] for i in order]) \
+                            if codes is None else (codes[order], texts)
+            self.request(('permute', order))
+
+    def column(self, df, col, casefold):
+        """Return the text of a column, or None if it is not kept.
+
+        Columns are only kept for one DataFrame at a time, so that searches
+        still running on data since sorted or replaced leave them alone.
+        """
+        if self.source is None:
+            self.source = df
+        if df is not self.source:
+            return None
+        key = col, casefold
+        if key not in self.columns:
+            codes, texts = search_texts(df.iloc[:, col], casefold)
+            size = text_bytes(codes, texts)
+            if self.used_bytes + size > self.max_bytes:
+                self.columns[key] = None
+            else:
+                self.columns[key] = codes, texts
+                self.used_bytes += size
+                if self.index and casefold and codes is not None and \
+                        df.dtypes.iat[col].kind == 'O' and \
+                        len(texts) >= self.index_texts:
+                    self.build(col, texts)
+        return self.columns[key]
+
+    def build(self, col, texts):
+        """Index texts of a column in the background."""
+        self.jobs.put((self.generation, col, texts))
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work)
+            self.worker.daemon = True
+            self.worker.start()
+
+    def close(self):
+        """Stop the background thread, waiting for indexes queued so far, and
+        any processes searching."""
+        if self.worker is not None:
+            self.jobs.put(None)
+            self.worker.join()
+            self.worker = None
+        with self.searching:
+            self.stop()
+
+    def spawn(self, df):
+        """Fork processes to search every so many columns of df each."""
+        processes = min(self.processes, df.shape[1])
+        for first in range(processes):
+            connection, child = multiprocessing.Pipe()
+            cache = SearchCache(self.max_bytes // processes, self.index,
+                                self.index_texts)
+            process = multiprocessing.Process(target=serve_search, args=(
+                    df, range(first, df.shape[1], processes), cache, child))
+            process.daemon = True
+            process.start()
+            self.pool.append((process, connection))
+
+    def stop(self):
+        """Stop any processes searching."""
+        for process, connection in self.pool:
+            try:
+                connection.send(None)
+            except (IOError, OSError): # already dead
+                process.terminate()
+        for process, connection in self.pool:
+            process.join()
+            connection.close()
+        del self.pool[:]
+
+    def request(self, request):
+        """Send a request to every process searching and gather replies.
+
+        If any process has died, all of them are stopped and no more are
+        forked.
+
+        :returns: replies, or None if the processes were stopped
+        :raises Exception: any exception raised in a process
+        """
+        try:
+            for process, connection in self.pool:
+                connection.send(request)
+            replies = [connection.recv() for process, connection in self.pool]
+        except (EOFError, IOError, OSError):
+            for process, connection in self.pool:
+                process.terminate()
+            self.stop()
+            self.processes = 1
+            return None
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def work(self):
+        """Build queued indexes until closed."""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            generation, col, texts = job
+            if generation == self.generation:
+                index = TrigramIndex(texts)
+                with self.lock:
+                    if generation == self.generation:
+                        self.indexes[col] = index
+
+    def sizes(self):
+        """Return the size in bytes and build time of each finished index."""
+        with self.lock:
+            sizes = [(index.used_bytes, index.build_seconds)
+                     for index in self.indexes.values()]
+        with self.searching:
+            for reply in self.request(('sizes',)) or []:
+                sizes += reply
+        return sizes
+
+    def stats(self):
+        """Describe the size and build time of finished indexes."""
+        sizes = self.sizes()
+        return 'search index: {} column{}, {:.1f} MiB, built in {:.2f} s'.format(
+                len(sizes), '' if len(sizes) == 1 else 's',
+                sum(used_bytes for used_bytes, _ in sizes) / 2**20,
+                sum(build_seconds for _, build_seconds in sizes))
+
+    def match_texts(self, col, query, texts):
+        """Flag distinct texts of a kept column matching query."""
+        with self.lock:
+            index = self.indexes.get(col)
+        if index is None or query.pattern is not None or len(query.needle) < 3:
+            return query.test(texts)
+        # Indexes hold lowercase texts, in the same order whatever the case
+        found = np.zeros(len(texts), dtype=bool)
+        positions = index.candidates(query.needle.lower())
+        found[positions] = query.test([texts[i] for i in positions.tolist()])
+        return found
+
+    def match_column(self, df, col, kind, query, start, stop):
+        """Flag cells of a column from start to stop matching query."""
+        if not query.searches(col):
+            return np.zeros(stop - start, dtype=bool)
+        if query.compares(kind):
+            values = df.iloc[start:stop, col]
+            if is_datetime64tz_dtype(values):
+                # Compare the wall time shown rather than UTC
+                values = values.dt.tz_localize(None)
+            return query.compare(values.values)
+        if query.impossible(kind):
+            return np.zeros(stop - start, dtype=bool)
+        shadow = self.column(df, col, not query.case)
+        if shadow is None:
+            codes, texts = search_texts(df.iloc[start:stop, col], not query.case)
+        elif shadow[0] is None:
+            codes, texts = None, shadow[1][start:stop]
+        else:
+            codes, texts = shadow[0][start:stop], shadow[1]
+        if codes is None:
+            return query.test(texts)
+        if shadow is None:
+            return query.test(texts)[codes]
+        if col not in self.found:
+            self.found[col] = self.match_texts(col, query, texts)
+        return self.found[col][codes]
+
+    def match(self, df, query, start, stop, cols=None):
+        """Flag cells of rows from start to stop matching a query.
+
+        :param df: underlying data to present
+        :type df: pandas.DataFrame
+        :param query: query, or string to match ignoring case
+        :type query: Query or str
+        :param start: first row of block
+        :type start: int
+        :param stop: row after last row of block
+        :type stop: int
+        :param cols: columns to search, or None for all
+        :type cols: list of int
+        :returns: flag for each cell of block, in the columns searched
+        :rtype: numpy.ndarray of bool
+        """
+        if isinstance(query, basestring):
+            query = Query(query)
+        with self.searching:
+            if self.source is None:
+                self.source = df
+            if cols is None and self.processes > 1 and df is self.source and \
+                    df.size >= self.parallel_cells:
+                if not self.pool:
+                    self.spawn(df)
+                processes = len(self.pool)
+                replies = self.request(('match', query, start, stop))
+                if replies is not None:
+                    found = np.empty((stop - start, df.shape[1]), dtype=bool)
+                    for first, reply in enumerate(replies):
+                        found[:, first::processes] = reply
+                    return found
+            if query.key != self.query:
+                self.query = query.key
+                self.found.clear()
+            dtypes = df.dtypes
+            return np.column_stack([
+                self.match_column(df, col, dtypes.iat[col].kind, query, start, stop)
+                for col in (range(df.shape[1]) if cols is None else cols)])
+
+
+def serve_search(df, cols, cache, connection):
+    """Answer requests from a SearchCache to search some columns of df.
+
+    Requests are a tuple of 'match' and the arguments of SearchCache.match(),
+    of 'permute' and the order of rows, or of 'sizes'. Exceptions raised are
+    sent back in place of replies.
+
+    :param df: underlying data to present
+    :type df: pandas.DataFrame
+    :param cols: columns to search
+    :type cols: list of int
+    :param cache: text of the columns searched so far
+    :type cache: SearchCache
+    :param connection: connection to receive requests on until None, and
+        send replies on
+    :type connection: multiprocessing.Connection
+    """
+    cache.source = df
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        try:
+            if request[0] == 'match':
+                reply = cache.match(df, *request[1:], cols=cols)
+            elif request[0] == 'permute':
+                df = df.take(request[1])
+                reply = cache.permute(df, request[1])
+            else:
+                reply = cache.sizes()
+        except Exception as e:
+            reply = e
+        connection.send(reply)
+    cache.close()
+
+
+def sweep(df, string, row, col, forward, cache=None, min_cells=2**12,
+          max_cells=2**20):
+    """Find the nearest cell containing string in row-major order.
+
+    Rows are searched in blocks in sweep order, starting from the cursor and
+    wrapping around the end of the DataFrame, so the cell at the cursor is
+    searched last. Blocks start small to find nearby matches quickly and grow
+    to amortize the cost of searching each column.
+
+    >>> df = pd.DataFrame([['a', 'b', 'c'], ['d', 'b', 'f']])
+    >>> sweep(df, 'b', 0, 1, True)
+    (1, 1)
+    >>> sweep(df, 'b', 0, 1, False)
+    (1, 1)
+    >>> sweep(df, 'a', 0, 0, True)
+    (0, 0)
+    >>> sweep(df, 'b', 1, 0, False, min_cells=1, max_cells=1)
+    (0, 1)
+
+    :param df: underlying data to present
+    :type df: pandas.DataFrame
+    :param string: query, or string to match ignoring case
+    :type string: Query or str
+    :param row: search starting row
+    :type row: int
+    :param col: search starting col
+    :type col: int
+    :param forward: flag to search forward instead of in reverse
+    :type forward: bool
+    :param cache: lowercase text of columns searched before
+    :type cache: SearchCache
+    :param min_cells: number of cells in the first block searched
+    :type min_cells: int
+    :param max_cells: largest number of cells in a block searched
+    :type max_cells: int
+    :returns: nearest matching row and column, or None if nothing matches
+    :rtype: int, int
+    """
+    rows, cols = df.shape
+    if not rows or not cols:
+        return None
+    cache = SearchCache() if cache is None else cache
+    cursor = row * cols + col
+    if forward:
+        legs = [(row, rows, lambda positions: positions > cursor),
+                (0, row + 1, lambda positions: positions <= cursor)]
+    else:
+        legs = [(0, row + 1, lambda positions: positions < cursor),
+                (row, rows, lambda positions: positions >= cursor)]
+    cells = min_cells
+    for start, stop, keep in legs:
+        while start < stop:
+            size = max(1, cells // cols)
+            if forward:
+                first, last = start, min(stop, start + size)
+                start = last
+            else:
+                first, last = max(start, stop - size), stop
+                stop = first
+            positions = first * cols + np.flatnonzero(
+                    cache.match(df, string, first, last))
+            positions = positions[keep(positions)]
+            if positions.size:
+                return divmod(int(positions[0 if forward else -1]), cols)
+            cells = min(2 * cells, max_cells)
+    return None
+
+
+def next_match(df, string, row, col, cache=None):
     """Forward sweep columns then rows for entry containing string match.
 
     >>> next_match(pd.DataFrame([['a', 'b', 'c'], ['d', 'e', 'f']]), 'e', 0, 0)
@@ -465,38 +2598,19 @@ def next_match(df, string, row, col):
 
     :param df: underlying data to present
     :type df: pandas.DataFrame
-    :param string: string to match
-    :type string: str
+    :param string: query, or string to match ignoring case
+    :type string: Query or str
     :param row: search starting row
     :type row: int
     :param col: search starting col
     :type col: int
-    :returns: next matching row and column
+    :returns: next matching row and column, or None if nothing matches
     :rtype: int, int
     """
-    rows, cols = df.shape
-    if col == cols - 1:
-        if row == rows - 1:
-            search_row = 0
-            search_col = 0
-        else:
-            search_row = row + 1
-            search_col = 0
-    else:
-        search_row = row
-        search_col = col + 1
-    while True:
-        while search_col < cols:
-            if string.lower() in unicode(df.iat[search_row, search_col]).lower():
-                return search_row, search_col
-            elif search_row == row and search_col == col:
-                return None
-            search_col += 1
-        search_col = 0
-        search_row = search_row + 1 if search_row + 1 < rows else 0
+    return sweep(df, string, row, col, True, cache)
 
 
-def prev_match(df, string, row, col):
+def prev_match(df, string, row, col, cache=None):
     """Reverse sweep columns then rows for entry containing string match.
 
     >>> prev_match(pd.DataFrame([['a', 'b', 'c'], ['d', 'e', 'f']]), 'e', 1, 2)
@@ -505,40 +2619,610 @@ def prev_match(df, string, row, col):
     (1, 1)
     >>> prev_match(pd.DataFrame([['a', 'b', 'c'], ['d', 'e', 'f']]), 'e', 0, 0)
     (1, 1)
+    >>> prev_match(pd.DataFrame([['a', 'b', 'c'], ['d', 'e', 'f']]), 'b', 1, 0)
+    (0, 1)
     >>> prev_match(pd.DataFrame([['a', 'b', 'c'], ['d', 'e', 'f']]), 'g', 0, 0) is None
     True
 
     :param df: underlying data to present
     :type df: pandas.DataFrame
-    :param string: string to match
-    :type string: str
+    :param string: query, or string to match ignoring case
+    :type string: Query or str
     :param row: search starting row
     :type row: int
     :param col: search starting col
     :type col: int
-    :returns: previous matching row and column
+    :returns: previous matching row and column, or None if nothing matches
     :rtype: int, int
     """
-    rows, cols = df.shape
-    if col == 0:
-        if row == 0:
-            search_row = rows - 1
-            search_col = cols - 1
-        else:
-            search_row = rows - 1
-            search_col = cols - 1
-    else:
-        search_row = row
-        search_col = col - 1
-    while True:
-        while search_col >= 0:
-            if string.lower() in unicode(df.iat[search_row, search_col]).lower():
-                return search_row, search_col
-            elif search_row == row and search_col == col:
+    return sweep(df, string, row, col, False, cache)
+
+
+class Matches(object):
+    """Every cell matching a search, found on a background thread.
+
+    Cells are numbered in row-major order. They are searched in blocks of rows
+    in sweep order, from the cell after row, col around to it, so the nearest
+    matches are found first, and blocks grow as in sweep(). A jump is made as
+    soon as the cells searched so far decide it. Once every cell has been
+    searched, a jump is a binary search of the sorted positions of matching
+    cells.
+
+    >>> df = pd.DataFrame([['spam', 'eggs'], ['ham', 'spam'], ['eggs', 'ham']])
+    >>> matches = Matches(df, 'am', SearchCache(), 1, 0, min_cells=2)
+    >>> matches.wait()
+    >>> matches.positions
+    array([0, 2, 3, 5])
+    >>> matches.step(1, 1, True), matches.step(0, 0, False)
+    ((2, 1), (2, 1))
+    >>> sorted(matches.visible([1, 2], [1]))
+    [(1, 1), (2, 1)]
+    >>> matches.status(1, 0)
+    u'match 2 of 4'
+
+    :param df: underlying data to present
+    :type df: pandas.DataFrame
+    :param string: query, or string to match ignoring case
+    :type string: Query or str
+    :param cache: lowercase text of columns searched before
+    :type cache: SearchCache
+    :param row: search starting row
+    :type row: int
+    :param col: search starting col
+    :type col: int
+    :param min_cells: number of cells in the first block searched
+    :type min_cells: int
+    :param max_cells: largest number of cells in a block searched
+    :type max_cells: int
+    """
+
+    def __init__(self, df, string, cache, row=0, col=0, min_cells=2**12,
+                 max_cells=2**20):
+        self.df = df
+        self.string = string
+        self.cache = cache
+        self.start = row * df.shape[1] + col
+        self.min_cells = min_cells
+        self.max_cells = max_cells
+        # Written by the worker thread only
+        self.hits = [] # increasing offsets of matches from the starting cell
+        self.searched = 0 # number of cells searched, in sweep order
+        self.positions = None # sorted positions of matches once all searched
+        self.cancelled = False
+        self.worker = threading.Thread(target=self.search)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def offset(self, positions):
+        """Number of cells from the cell after the starting cell, in sweep order."""
+        return (positions - self.start - 1) % self.df.size
+
+    def position(self, offsets):
+        """Position of cells a number of cells after the starting cell."""
+        return (offsets + self.start + 1) % self.df.size
+
+    def search(self):
+        """Find matching cells, block by block until done or cancelled."""
+        rows, cols = self.df.shape
+        if not rows or not cols:
+            self.positions = np.array([], dtype=np.int64)
+            return
+        row = self.start // cols
+        legs = [(row, rows, lambda positions: positions > self.start, 0),
+                (0, row + 1, lambda positions: positions <= self.start,
+                 self.df.size)]
+        cells = self.min_cells
+        for start, stop, keep, wrapped in legs:
+            while start < stop:
+                if self.cancelled:
+                    return
+                last = min(stop, start + max(1, cells // cols))
+                positions = start * cols + np.flatnonzero(
+                        self.cache.match(self.df, self.string, start, last))
+                self.hits.append(self.offset(positions[keep(positions)]))
+                self.searched = min(self.df.size,
+                                    wrapped + last * cols - self.start - 1)
+                start = last
+                cells = min(2 * cells, self.max_cells)
+        self.searched = self.df.size
+        self.positions = np.sort(self.position(np.concatenate(self.hits)))
+
+    def found(self):
+        """Offsets of matches found so far, only among cells searched."""
+        searched = self.searched
+        offsets = np.concatenate([np.array([], dtype=np.int64)] + self.hits[:])
+        return offsets[offsets < searched]
+
+    def ready(self):
+        """Check whether every cell has been searched."""
+        return self.positions is not None
+
+    def wait(self):
+        """Wait until every cell has been searched or searching is cancelled."""
+        self.worker.join()
+
+    def cancel(self):
+        """Stop searching after the block being searched, without waiting."""
+        self.cancelled = True
+
+    def step(self, row, col, forward):
+        """Nearest matching cell after or before a cell, wrapping around.
+
+        :param row: search starting row
+        :type row: int
+        :param col: search starting col
+        :type col: int
+        :param forward: flag to search forward instead of in reverse
+        :type forward: bool
+        :returns: nearest matching row and column, None if nothing matches,
+            or False if not enough cells have been searched to tell yet
+        :rtype: int, int
+        """
+        rows, cols = self.df.shape
+        positions = self.positions
+        if positions is not None:
+            if not positions.size:
                 return None
-            search_col -= 1
-        search_col = cols - 1
-        search_row = search_row - 1 if search_row - 1 >= 0 else rows - 1
+            cursor = row * cols + col
+            if forward:
+                i = np.searchsorted(positions, cursor, 'right') % positions.size
+            else:
+                i = np.searchsorted(positions, cursor, 'left') - 1
+            return divmod(int(positions[i]), cols)
+        searched = self.searched
+        offsets = self.found()
+        cursor = self.offset(row * cols + col)
+        if forward and cursor < searched:
+            offsets = offsets[offsets > cursor]
+            if offsets.size:
+                return divmod(int(self.position(offsets[0])), cols)
+        elif not forward and cursor <= searched:
+            offsets = offsets[offsets < cursor]
+            if offsets.size:
+                return divmod(int(self.position(offsets[-1])), cols)
+        return False
+
+    def visible(self, rows, cols):
+        """Matching cells found so far among rows and columns on screen.
+
+        :param rows: consecutive rows on screen
+        :type rows: list of int
+        :param cols: columns on screen
+        :type cols: list of int
+        :returns: matching rows and columns
+        :rtype: set of (int, int)
+        """
+        if not rows:
+            return set()
+        width = self.df.shape[1]
+        first, last = rows[0] * width, (rows[-1] + 1) * width
+        positions = self.positions
+        if positions is None:
+            positions = self.position(self.found())
+            positions = positions[(first <= positions) & (positions < last)]
+        else:
+            positions = positions[slice(*np.searchsorted(positions, [first, last]))]
+        cols = set(cols)
+        return set((int(row), int(col)) for row, col in
+                   zip(*divmod(positions, width)) if col in cols)
+
+    def status(self, row, col):
+        """Describe how many cells match and which of them is at row, col."""
+        positions = self.positions
+        if positions is None:
+            count = self.found().size
+            return '{} match{} so far, {}% searched…'.format(
+                    count, '' if count == 1 else 'es',
+                    100 * self.searched // self.df.size)
+        elif not positions.size:
+            return 'no matches'
+        if row is not None and col is not None:
+            cursor = row * self.df.shape[1] + col
+            i = np.searchsorted(positions, cursor)
+            if i < positions.size and positions[i] == cursor:
+                return 'match {} of {}'.format(i + 1, positions.size)
+        return '{} match{}'.format(positions.size,
+                                   '' if positions.size == 1 else 'es')
+
+
+def sort_order(series, ascending):
+    """Positions of values in sorted order, as DataFrame.sort_values() sorts.
+
+    Sorting is stable and missing values are placed last. Categoricals are
+    sorted by their codes, so that sorting them in descending order is stable
+    too.
+
+    >>> sort_order(pd.Series([2, np.nan, 1, 2]), True)
+    array([2, 0, 3, 1])
+    >>> sort_order(pd.Series([2, np.nan, 1, 2]), False)
+    array([0, 3, 2, 1])
+    >>> sort_order(pd.Series(['b', 'a', 'b'], dtype='category'), False)
+    array([0, 2, 1])
+
+    :param series: values to sort
+    :type series: pandas.Series
+    :param ascending: flag to sort in ascending instead of descending order
+    :type ascending: bool
+    :returns: position of each value in sorted order
+    :rtype: numpy.ndarray of int
+    """
+    return nargsort(sort_values(series), kind='mergesort', ascending=ascending,
+                    na_position='last')
+
+
+def sort_values(series):
+    """Values of a Series as they are sorted, categoricals by their codes."""
+    values = series.values
+    if is_categorical_dtype(series):
+        values = np.where(values.codes < 0, np.nan, values.codes)
+    return values
+
+
+def dense_ranks(series):
+    """Rank each value among the distinct values of a Series.
+
+    Equal values share a rank, and missing values are ranked after every
+    other value. Categoricals are ranked by their codes, so categories not
+    present keep their ranks.
+
+    >>> dense_ranks(pd.Series(['b', None, 'a', 'b']))
+    (array([1, 2, 0, 1], dtype=int32), 2)
+    >>> dense_ranks(pd.Series(['b', None, 'b'], dtype='category'))
+    (array([0, 1, 0], dtype=int32), 1)
+
+    :param series: values to rank
+    :type series: pandas.Series
+    :returns: rank of each value, and number of distinct values not missing
+    :rtype: numpy.ndarray of int, int
+    """
+    if is_categorical_dtype(series):
+        ranks = series.values.codes.astype(np.int32)
+        distinct = len(series.cat.categories)
+        ranks[ranks < 0] = distinct
+        return ranks, distinct
+    values = series.values
+    try:
+        codes = pd.factorize(values, sort=True)[0]
+    except TypeError: # values which cannot be ranked by factorize()
+        order = sort_order(series, True)
+        head = order[:len(order) - int(pd.isnull(values).sum())]
+        ordered = values[head]
+        codes = np.full(len(values), -1, dtype=np.int64)
+        codes[head] = np.cumsum(np.append(0, ordered[1:] != ordered[:-1]))
+    ranks = codes.astype(np.int32 if len(codes) < 2**31 else np.int64)
+    distinct = int(ranks.max() if ranks.size else -1) + 1
+    ranks[ranks < 0] = distinct
+    return ranks, distinct
+
+
+def top_order(series, ascending, k):
+    """First k positions of sort_order(), found without sorting every value.
+
+    Values are partitioned around the k-th value, so only those before it
+    and the first of those equal to it are sorted. Objects are compared by
+    the rank of each distinct value, which is faster than comparing them.
+
+    >>> series = pd.Series([3, np.nan, 1, 3, 2, 3])
+    >>> top_order(series, True, 3), top_order(series, False, 2)
+    (array([2, 4, 0]), array([0, 3]))
+
+    :param series: values to sort
+    :type series: pandas.Series
+    :param ascending: flag to sort in ascending instead of descending order
+    :type ascending: bool
+    :param k: number of positions to find
+    :type k: int
+    :returns: position of each of the first k values in sorted order
+    :rtype: numpy.ndarray of int
+    """
+    values = sort_values(series)
+    if values.dtype.kind == 'O':
+        try:
+            codes = pd.factorize(values, sort=True)[0]
+        except TypeError: # values which cannot be ranked
+            return sort_order(series, ascending)[:k]
+        values = np.where(codes < 0, np.nan, codes)
+    present = np.flatnonzero(~pd.isnull(values))
+    if k >= len(present):
+        return sort_order(series, ascending)[:k]
+    kth = k - 1 if ascending else len(present) - k
+    threshold = np.partition(values[present], kth)[kth]
+    with np.errstate(invalid='ignore'):
+        before = np.flatnonzero(values < threshold if ascending else
+                                values > threshold)
+    ties = np.flatnonzero(values == threshold)[:k - len(before)]
+    positions = np.union1d(before, ties)
+    return positions[nargsort(values[positions], kind='mergesort',
+                              ascending=ascending)]
+
+
+def reverse_order(series, order):
+    """Reverse a stable sort order, keeping it stable.
+
+    Runs of equal values are reversed as wholes, keeping the order within
+    each, and missing values stay last, as sort_order() in the other
+    direction would give.
+
+    >>> series = pd.Series([2, np.nan, 1, 2])
+    >>> reverse_order(series, sort_order(series, True))
+    array([0, 3, 2, 1])
+    >>> reverse_order(series, sort_order(series, False))
+    array([2, 0, 3, 1])
+
+    :param series: values sorted
+    :type series: pandas.Series
+    :param order: position of each value in stable sorted order, missing
+        values last
+    :type order: numpy.ndarray of int
+    :returns: position of each value in stable sorted order the other way
+    :rtype: numpy.ndarray of int
+    """
+    present = len(order) - int(series.isnull().sum())
+    head = order[:present]
+    values = np.asarray(series)[head]
+    starts = np.flatnonzero(np.append(True, values[1:] != values[:-1]))
+    lengths = np.diff(np.append(starts, present))
+    # Each run moves from its start to as far from the end as it was from it
+    positions = np.repeat(present - starts - lengths - starts, lengths) + \
+            np.arange(present)
+    reversed_head = np.empty_like(head)
+    reversed_head[positions] = head
+    return np.concatenate([reversed_head, order[present:]])
+
+
+class SortCache(object):
+    """Bounded LRU cache of the sort orders of a DataFrame by its columns.
+
+    Orders are stable positions of rows of the DataFrame as it was given, so
+    sorting again by another column breaks ties in that order rather than the
+    order of the last sort. An order in one direction is reversed with
+    reverse_order() for the other, so only the first sort of each column is
+    a full sort. Sorting by several columns at once is a single stable sort
+    of the dense_ranks() of each, which are cached too, combined into one
+    integer per row if they fit or else sorted with lexsort. Columns of
+    strings and other objects, and categoricals, are always sorted by their
+    ranks, as integers are much faster to compare, and take less memory.
+    Rows are taken with take(), so sorting a View only composes positions.
+    Replace the SortCache whenever the contents of the DataFrame change
+    (commands). Orders may be found on other threads with Sorting.
+
+    >>> sorts = SortCache(pd.DataFrame({'a': [2, 1, 2], 'b': [3, 4, 5]}))
+    >>> df, moved = sorts.sort(0, True)
+    >>> df.index.tolist(), moved
+    ([1, 0, 2], array([1, 0, 2]))
+    >>> df, moved = sorts.sort(0, False)
+    >>> df.index.tolist(), moved
+    ([0, 2, 1], array([1, 2, 0]))
+    >>> sorts.sort(0, False)[0] is df
+    True
+    >>> sorted(sorts.orders)
+    [(0, False), (0, True)]
+    >>> sorts.top(1, False, 1).index.tolist()
+    [2, 0, 1]
+    >>> sorts.sort((0, 1), False)[0].index.tolist(), sorted(sorts.ranks)
+    ([2, 0, 1], [0, 1])
+    >>> sorts.stats()
+    u'sort ranks: 2 columns, 0.0 MiB for 0.0 MiB of values'
+    >>> names = SortCache(pd.DataFrame({'a': ['b', 'a']}))
+    >>> names.quick(0), names.sort(0, True)[0].index.tolist(), names.quick(0)
+    (False, [1, 0], True)
+
+    :param df: underlying data to present, in the order sorts start from
+    :type df: pandas.DataFrame or View
+    :param max_bytes: approximate memory budget for cached orders
+    :type max_bytes: int
+    """
+
+    def __init__(self, df, max_bytes=2**28):
+        self.df = df
+        self.max_bytes = max_bytes
+        self.orders = OrderedDict()
+        self.ranks = OrderedDict()
+        self.value_bytes = {} # deep size of each column ranked
+        self.used_bytes = 0
+        self.order = None # order of rows shown, or None if as given
+        self.shown = df
+        self.lock = threading.Lock() # held while changing orders
+
+    def known(self, col, ascending):
+        """Check whether the order of rows sorted by columns is cached."""
+        with self.lock:
+            return (col, ascending) in self.orders
+
+    def quick(self, col):
+        """Check whether top() can sort by a column without ranking it first."""
+        with self.lock:
+            return not self.ranked(col) or col in self.ranks
+
+    def keep(self, entries, key, value):
+        """Store an order or ranks, evicting least recently used ones, ranks
+        first, over budget."""
+        with self.lock:
+            if key in entries:
+                self.used_bytes -= entries.pop(key)[0].nbytes
+            entries[key] = value
+            self.used_bytes += value[0].nbytes
+            for old_entries in [self.ranks, self.orders]:
+                while self.used_bytes > self.max_bytes and len(old_entries) > 1:
+                    _, old_value = old_entries.popitem(last=False)
+                    self.used_bytes -= old_value[0].nbytes
+
+    def dense_ranks(self, col):
+        """Return dense_ranks() of a column, marking them as recently used."""
+        with self.lock:
+            ranks = self.ranks.get(col)
+        if ranks is None:
+            series = self.df.iloc[:, col]
+            ranks = dense_ranks(series)
+            size = series.memory_usage(index=False, deep=True)
+            with self.lock:
+                self.value_bytes[col] = size
+        self.keep(self.ranks, col, ranks)
+        return ranks
+
+    def ranked(self, col):
+        """Check whether a column is always sorted by its ranks."""
+        return self.df.dtypes.iat[col].kind == 'O'
+
+    def key(self, col, ascending):
+        """Return integers whose ascending stable order is that of a column.
+
+        Missing values stay last in both directions.
+        """
+        ranks, distinct = self.dense_ranks(col)
+        return ranks if ascending else \
+                np.where(ranks == distinct, distinct, distinct - 1 - ranks)
+
+    def stats(self):
+        """Describe the memory taken by ranks and by the values ranked."""
+        with self.lock:
+            ranks = list(self.ranks.items())
+            value_bytes = sum(self.value_bytes[col] for col, _ in ranks)
+        return 'sort ranks: {} column{}, {:.1f} MiB for {:.1f} MiB of values'.format(
+                len(ranks), '' if len(ranks) == 1 else 's',
+                sum(entry[0].nbytes for _, entry in ranks) / 2**20,
+                value_bytes / 2**20)
+
+    def sort_order(self, col, ascending):
+        """Return the stable order of rows sorted by a column, or by a tuple
+        of columns in turn, marking it as recently used."""
+        key = col, ascending
+        with self.lock:
+            order = self.orders.get(key)
+            other = self.orders.get((col, not ascending))
+        if order is not None:
+            order = order[0]
+        elif isinstance(col, tuple):
+            keys = [self.key(each, ascending) for each in col]
+            spans = [self.dense_ranks(each)[1] + 1 for each in col]
+            if reduce(operator.mul, spans) < 2**63:
+                combined = np.zeros(self.df.shape[0], dtype=np.int64)
+                for ranks, span in zip(keys, spans):
+                    combined = combined * span + ranks
+                order = np.argsort(combined, kind='mergesort')
+            else:
+                order = np.lexsort(keys[::-1])
+        elif self.ranked(col):
+            order = np.argsort(self.key(col, ascending), kind='mergesort')
+        elif other is None:
+            order = sort_order(self.df.iloc[:, col], ascending)
+        else:
+            order = reverse_order(self.df.iloc[:, col], other[0])
+        self.keep(self.orders, key, (order,))
+        return order
+
+    def top(self, col, ascending, k):
+        """Return data sorted by a column in its first k rows only.
+
+        The other rows follow in the order given. Neither the order nor the
+        data returned is kept, so sort() afterwards finds the full order as
+        though nothing had been shown.
+
+        :param col: column to sort by
+        :type col: int
+        :param ascending: flag to sort in ascending instead of descending order
+        :type ascending: bool
+        :param k: number of rows to sort
+        :type k: int
+        :rtype: pandas.DataFrame or View
+        """
+        if self.ranked(col):
+            first = top_order(pd.Series(self.key(col, ascending)), True, k)
+        else:
+            first = top_order(self.df.iloc[:, col], ascending, k)
+        rest = np.ones(self.df.shape[0], dtype=bool)
+        rest[first] = False
+        return self.df.take(np.concatenate([first, np.flatnonzero(rest)]))
+
+    def sort(self, col, ascending):
+        """Sort rows by a column.
+
+        :param col: column to sort by, or columns in turn
+        :type col: int or tuple of int
+        :param ascending: flag to sort in ascending instead of descending order
+        :type ascending: bool
+        :returns: sorted data, the same object if the order is unchanged, and
+            the position of each of its rows in the data shown before
+        :rtype: pandas.DataFrame or View, numpy.ndarray of int
+        """
+        order = self.sort_order(col, ascending)
+        if order is self.order:
+            return self.shown, np.arange(len(order))
+        if self.order is None:
+            moved = order
+        else:
+            position = np.empty_like(self.order)
+            position[self.order] = np.arange(len(self.order))
+            moved = position[order]
+        self.order, self.shown = order, self.df.take(order)
+        return self.shown, moved
+
+
+class Sorting(object):
+    """Stable order of rows sorted by a column, found on a background thread.
+
+    The order is kept by a SortCache, from which sort() then returns it at
+    once. An order which cannot be found, because values cannot be compared,
+    is left for sort() to raise the error on the calling thread. Sorting by
+    several columns takes a step to rank each of them, then one to sort, and
+    can be cancelled between steps.
+
+    >>> sorts = SortCache(pd.DataFrame({'a': [2, 1, 2], 'b': [3, 4, 5]}))
+    >>> sorting = Sorting(sorts, (0, 1), True)
+    >>> sorting.wait()
+    >>> sorting.ready(), sorts.known((0, 1), True), sorting.step
+    (True, True, 3)
+
+    :param sorts: cache to keep the order in
+    :type sorts: SortCache
+    :param col: column to sort by, or columns in turn
+    :type col: int or tuple of int
+    :param ascending: flag to sort in ascending instead of descending order
+    :type ascending: bool
+    """
+
+    def __init__(self, sorts, col, ascending):
+        self.sorts = sorts
+        self.col = col
+        self.ascending = ascending
+        self.steps = len(col) + 1 if isinstance(col, tuple) else 1
+        self.step = 0 # steps taken, written by the worker thread only
+        self.cancelled = False
+        self.started = time()
+        self.worker = threading.Thread(target=self.sort)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def sort(self):
+        """Find the order."""
+        try:
+            for each in self.col if isinstance(self.col, tuple) else []:
+                if self.cancelled:
+                    return
+                self.sorts.dense_ranks(each)
+                self.step += 1
+            if not self.cancelled:
+                self.sorts.sort_order(self.col, self.ascending)
+                self.step += 1
+        except Exception:
+            pass # raised again by SortCache.sort()
+
+    def cancel(self):
+        """Stop sorting after the step being taken, without waiting."""
+        self.cancelled = True
+
+    def status(self):
+        """Describe progress for the status line."""
+        return 'sorting: step {} of {}, {:.1f} s, esc to cancel'.format(
+                min(self.step + 1, self.steps), self.steps, time() - self.started)
+
+    def ready(self):
+        """Check whether the order has been found or given up on."""
+        return not self.worker.is_alive()
+
+    def wait(self):
+        """Wait until the order has been found or given up on."""
+        self.worker.join()
 
 
 def jump(left, right, top, bottom, rows, cols, to_row, to_col, resizing):
@@ -576,22 +3260,21 @@ def jump(left, right, top, bottom, rows, cols, to_row, to_col, resizing):
     return left, right, top, bottom, moving_right, moving_down
 
 
-def eval_command(stdscr, df, command, row, left, right, top, bottom, keystrokes):
+def command_frame(df, command, left, right, top, bottom):
     """Call method on DataFrame selection.
 
     If the selection is just a single cell, the call is made to the entire
-    DataFrame inplace. If the selection is more than one cell, then this
-    function creates a new DataFrame and makes a nested call to the main
-    function run().
+    DataFrame.
+
+    >>> command_frame(pd.DataFrame([[1, 2], [3, 4]]), 'sum()', 0, 1, 0, 1)
+       0
+    0  4
+    1  6
 
-    :param stdscr: window object to update
-    :type stdscr: curses.window
     :param df: underlying data to present
-    :type df: pandas.DataFrame
+    :type df: pandas.DataFrame or View
     :param command: DataFrame method to call
     :type command: str
-    :param row: y position on screen to draw input box
-    :type row: int
     :param left: leftmost column of selection
     :type left: int
     :param right: rightmost column of selection
@@ -600,38 +3283,173 @@ def eval_command(stdscr, df, command, row, left, right, top, bottom, keystrokes)
     :type top: int
     :param bottom: bottommost row of selection
     :type bottom: int
-    :param keystrokes: keystrokes to use in autopilot.
-    :type keystrokes: generator yielding int
+    :returns: result of the call
+    :rtype: pandas.DataFrame
+    """
+    single = left == right and top == bottom
+    if single and isinstance(df, View):
+        df = df.frame()
+    return pd.DataFrame(eval('df{selection}.{command}'.format(\
+            selection='' if single else '.iloc[top:bottom+1, left:right+1]',
+            command=command)))
+
+
+def serve_command(df, command, left, right, top, bottom, connection):
+    """Send the result of command_frame() for a Command.
+
+    :param connection: connection to send a tuple of 'result' and the
+        DataFrame on, or of 'error' and a message
+    :type connection: multiprocessing.Connection
     """
     try:
-        single = left == right and top == bottom
-        result = pd.DataFrame(eval('df{selection}.{command}'.format(\
-                selection='' if single else '.iloc[top:bottom+1, left:right+1]',
-                command=command)))
-        if single:
-            return result
-        else:
-            run(stdscr, result, keystrokes)
+        reply = 'result', command_frame(df, command, left, right, top, bottom)
+        connection.send(reply)
     except Exception as e:
-        stdscr.clrtoeol()
-        stdscr.addstr(row, 0, ':invalid command: {}'.format(e.message))
-        stdscr.refresh()
+        connection.send(('error', '{}'.format(e)))
+    connection.close()
+
+
+class Command(object):
+    """DataFrame method called on a selection in a separate process.
+
+    Unlike a thread, the process can be stopped at any time, which is how a
+    command is cancelled. The result is sent back pickled, which for results
+    as large as the DataFrame can take as long as the call itself.
 
+    >>> command = Command(pd.DataFrame([[1, 2], [3, 4]]), 'sum()', 0, 1, 0, 1)
+    >>> command.wait()
+    >>> command.ready(), command.error, command.result[0].tolist()
+    (True, None, [4, 6])
+    >>> command = Command(pd.DataFrame([[1, 2], [3, 4]]), 'fail()', 0, 0, 0, 0)
+    >>> command.wait()
+    >>> command.result, command.error
+    (None, u"'DataFrame' object has no attribute 'fail'")
 
-def run(stdscr, df, keystrokes=None):
+    :param df: underlying data to present
+    :type df: pandas.DataFrame or View
+    :param command: DataFrame method to call
+    :type command: str
+    :param left: leftmost column of selection
+    :type left: int
+    :param right: rightmost column of selection
+    :type left: int
+    :param top: topmost row of selection
+    :type top: int
+    :param bottom: bottommost row of selection
+    :type bottom: int
+    """
+
+    def __init__(self, df, command, left, right, top, bottom):
+        self.command = command
+        self.single = left == right and top == bottom
+        self.result, self.error = None, None
+        self.started = time()
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve_command, args=(
+                df, command, left, right, top, bottom, child))
+        self.process.daemon = True
+        self.process.start()
+        child.close() # so that the process stopping ends receive()
+        self.worker = threading.Thread(target=self.receive)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def receive(self):
+        """Wait for the result or an error from the process."""
+        try:
+            kind, reply = self.connection.recv()
+        except Exception: # stopped, possibly partway through sending
+            kind, reply = 'error', 'command stopped'
+        if kind == 'result':
+            self.result = reply
+        else:
+            self.error = reply
+        self.connection.close()
+
+    def cancel(self):
+        """Stop the process, without waiting."""
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def elapsed(self):
+        """Return seconds since the command was started."""
+        return time() - self.started
+
+    def status(self):
+        """Describe progress for the status line."""
+        return 'running {}: {:.1f} s, esc to cancel'.format(
+                self.command, self.elapsed())
+
+    def ready(self):
+        """Check whether the result or an error has been received."""
+        return not self.worker.is_alive()
+
+    def wait(self):
+        """Wait until the result or an error has been received, and the
+        process has exited."""
+        self.worker.join()
+        self.process.join()
+
+
+def run(stdscr, df, keystrokes=None, max_fps=60, tiles=None, index=False,
+        processes=1, time_limit=None):
     """Main loop; set state of window and wait for keystrokes.
 
-    >>> run(curses.initscr(),
+    >>> run(VirtualScreen(),
     ...     pd.DataFrame([['a' ,'b', 'c'], [1, 2, 3], [4.0, 5.0, 6.0]]),
-    ...     keystrokes=iter(ord(c) for c in 'vljhk\x1b.,><tyty[]GG$/c\\rnp^ggjvllv:sum()\\rq:fail()\\r\x1b:sort_values(1)\\rsSx\x06\x02q')) is None
+    ...     keystrokes=iter(ord(c) for c in 'vljhk\x1b.,><tyty[]GG$/c\\rnp^ggjvllv:sum()\\rq:fail()\\r\x1b:sort_values(1)\\rsSnix\x06\x02q')) is None
+    True
+    >>> stdscr = VirtualScreen()
+    >>> run(stdscr, pd.DataFrame({'a': np.arange(300000)[::-1]}),
+    ...     keystrokes=iter(ord(c) for c in 'GGsq')) is None
+    True
+    >>> stdscr.text()[1][:8], stdscr.cells[1][8][1] == curses.A_REVERSE
+    (u'299999  ', True)
+    >>> stdscr, tiles = VirtualScreen(6, 20), TileCache()
+    >>> run(stdscr, pd.DataFrame({'a': range(10)}), tiles=tiles,
+    ...     keystrokes=iter(ord(c) for c in 'GGtq')) is None
+    True
+    >>> stdscr.text()[3:5]
+    [u'9       9           ', u'                    ']
+    >>> run(stdscr, pd.DataFrame({'a': range(10)}), tiles=tiles,
+    ...     keystrokes=iter(ord(c) for c in 'GGttq')) is None
+    True
+    >>> tiles.close()
+    >>> stdscr.text()[0]
+    u'        a           '
+    >>> stdscr = VirtualScreen()
+    >>> run(stdscr, pd.DataFrame({'a': [1.5, 2.5], 'b': ['x', 'y']}),
+    ...     keystrokes=iter(ord(c) for c in
+    ...                     ':iloc[:0]\\rvjl:sum()\\rvj:sum()\\rqq')) is None
+    True
+    >>> stdscr.text()[-1].strip()
+    u'empty result'
+    >>> tiles = TileCache(tile_rows=16)
+    >>> run(VirtualScreen(),
+    ...     pd.DataFrame(np.arange(600).reshape(200, 3)),
+    ...     keystrokes=iter(ord(c) for c in 'jjvjj\x1b\x06\x06\x02.>GGs'
+    ...                                     'vjl:cumsum()\\rjqq'),
+    ...     tiles=tiles) is None
     True
+    >>> tiles.close()
 
     :param stdscr: window object to update
-    :type stdscr: curses.window
-    :param df: underlying data to present
-    :type df: pandas.DataFrame
+    :type stdscr: curses.window or Window
+    :param df: underlying data to present, shown through a View so that
+        sorting never copies it
+    :type df: pandas.DataFrame or View
     :param keystrokes: keystrokes to use in autopilot.
     :type keystrokes: generator yielding int
+    :param max_fps: maximum number of frames drawn per second
+    :type max_fps: float
+    :param tiles: optional cache of pre-rendered contents to draw from
+    :type tiles: TileCache
+    :param index: flag to index large string columns by trigrams for searching
+    :type index: bool
+    :param processes: number of processes to search large DataFrames with
+    :type processes: int
+    :param time_limit: seconds after which commands are stopped, if any
+    :type time_limit: float
     """
     stdscr.clear()
     stdscr.scrollok(False)
@@ -639,6 +3457,7 @@ def run(stdscr, df, keystrokes=None):
     screen_y -= 1 # Avoid writing to last line
     frozen_y, frozen_x = 1, 8
     unfrozen_y, unfrozen_x = screen_y - frozen_y, screen_x - frozen_x
+    df = View(df)
     rows, cols = df.shape
     left, right, top, bottom = 0, 0, 0, 0
     cum_heights = np.append(np.array([0]), np.full(rows, 1).cumsum())
@@ -649,26 +3468,159 @@ def run(stdscr, df, keystrokes=None):
     max_history = 10
     keystroke_history = deque([], max_history)
     search_string = ''
+    query = Query(search_string)
     found_row, found_col = None, None
+    matches, status, jumping = None, None, None
+    # Rows shown sorted while sorting: 0 until the sort is swapped in at once,
+    # the number sorted so far, or None while showing the previous order
+    sorting, sorted_rows, unsorted, resume = None, None, None, False
+    deferred = None # keystroke waiting for a sort to finish
+    running = None # command being called
+    frame = Frame()
+    cache = CellCache()
+    search = SearchCache(index=index, processes=processes)
+    sorts = SortCache(df)
     keystroke = stdscr.getch if not keystrokes else keystrokes.next
+    redraw, drawn_at = True, 0.0
 
     while True:
-        origin_y, origin_x = draw(stdscr, df, frozen_y, frozen_x, unfrozen_y,
-                                  unfrozen_x, origin_y, origin_x, left, right,
-                                  top, bottom, found_row, found_col,
-                                  cum_widths, cum_heights,
-                                  moving_right, moving_down, resizing)
-        keypress = keystroke()
+        # Show the result of a command once called
+        if running is not None:
+            if keystrokes is not None:
+                running.wait()
+            elif time_limit is not None and running.elapsed() > time_limit:
+                running.cancel()
+                running = None
+                status = show_status(stdscr, 'command stopped after {:.1f} s'.format(
+                        time_limit), screen_y, screen_x)
+            if running is not None and running.ready():
+                if running.error is not None:
+                    status = show_status(stdscr, ':invalid command: {}'.format(
+                            running.error), screen_y, screen_x)
+                elif 0 in running.result.shape:
+                    # Nothing to move around in, keep showing this view
+                    status = show_status(stdscr, 'empty result', screen_y, screen_x)
+                elif not running.single:
+                    # Tiles of this view are rendered again once back to it
+                    run(stdscr, running.result, keystrokes, max_fps, tiles,
+                        index=index, processes=processes, time_limit=time_limit)
+                    frame.invalidate() # nested views draw over this one
+                    status = None
+                else:
+                    if sorting is not None:
+                        sorting.cancel()
+                        sorting, sorted_rows, unsorted, resume = None, None, None, False
+                    if matches is not None:
+                        matches.cancel()
+                    df = View(running.result)
+                    if df.shape != (rows, cols):
+                        stdscr.clear() # draw() only paints cells with data
+                        frame.invalidate()
+                    if df.shape[0] != rows:
+                        rows = df.shape[0]
+                        cum_heights = np.append(np.array([0]), np.full(rows, 1).cumsum())
+                        top = bottom = max(0, min(top, rows - 1))
+                    if df.shape[1] != cols:
+                        cols = df.shape[1]
+                        cum_widths = np.append(np.array([0]), np.full(cols, 10).cumsum())
+                        left = right = max(0, min(left, cols - 1))
+                    cache.invalidate()
+                    search.invalidate(df)
+                    sorts = SortCache(df)
+                    if matches is not None:
+                        matches = Matches(df, query, search, bottom, right)
+                    status = show_status(stdscr, 'called in {:.1f} s'.format(
+                            running.elapsed()), screen_y, screen_x)
+                running = None
+                redraw = True
+        # Swap in a full sort once found, or once rows past those sorted so far
+        # are shown
+        if sorting is not None:
+            if keystrokes is not None or sorted_rows is not None and \
+                    max(origin_y, bottom) + unfrozen_y >= sorted_rows:
+                sorting.wait()
+            if sorting.ready():
+                sorted_df, moved = sorts.sort(sorting.col, sorting.ascending)
+                if sorted_df is not df:
+                    if matches is not None:
+                        matches.cancel()
+                    resume = resume or matches is not None
+                    if not sorted_rows:
+                        # Keep the selection on the rows it was on, at the same
+                        # height on screen
+                        shift = int(np.flatnonzero(moved == bottom)[0]) - bottom
+                        top, bottom = max(0, top + shift), bottom + shift
+                        origin_y = min(max(0, origin_y + shift),
+                                       max(0, rows - unfrozen_y))
+                        moving_down = shift > 0
+                    df = sorted_df
+                    cache.invalidate()
+                    search.permute(df, moved)
+                    if resume:
+                        matches = Matches(df, query, search, bottom, right)
+                if sorted_rows != 0:
+                    status = show_status(stdscr, 'sorted in {:.1f} s'.format(
+                            time() - sorting.started), screen_y, screen_x)
+                sorting, sorted_rows, unsorted, resume = None, None, None, False
+                redraw = True
+        if redraw:
+            origin_y, origin_x = draw(stdscr, df, frozen_y, frozen_x,
+                                      unfrozen_y, unfrozen_x, origin_y,
+                                      origin_x, left, right, top, bottom,
+                                      found_row, found_col,
+                                      cum_widths, cum_heights,
+                                      moving_right, moving_down, resizing,
+                                      frame, cache, tiles, matches)
+            drawn_at = time()
+            progress = sorting.status() if sorting is not None and \
+                    sorted_rows != 0 else None
+            if running is not None and progress is None:
+                progress = running.status()
+            if matches is not None and progress is None:
+                progress = matches.status(found_row, found_col)
+            if progress is not None and progress != status:
+                status = show_status(stdscr, progress, screen_y, screen_x)
+        if keystrokes is None:
+            # Wake up to show highlights and count once matches are counted,
+            # to show a sort once found, and to time and show commands
+            stdscr.timeout(100 if sorting is not None or running is not None or
+                           matches is not None and not matches.ready() else -1)
+        keypress = keystroke() if deferred is None else deferred
+        deferred = None
+        if sorting is not None and sorted_rows and \
+                keypress in [ord(c) for c in '/np:sS']:
+            # Search, commands and sorts need every row in order
+            sorting.wait()
+            deferred = keypress
+            continue
         if keypress in [ord('q')]:
             break
         if keypress in [ord('d')]:
             debug(stdscr)
+            frame.invalidate()
         if keypress in [ord('v')]:
             resizing = not resizing
         if keypress in [ord('\x1b')]: # escape key
             resizing = False
             right = left
             bottom = top
+            if matches is not None and not matches.ready():
+                matches.cancel()
+                matches, jumping = None, None
+                status = show_status(stdscr, 'search cancelled', screen_y, screen_x)
+            if sorting is not None:
+                sorting.cancel()
+                if unsorted is not None:
+                    df = unsorted
+                    cache.invalidate()
+                    if resume:
+                        matches = Matches(df, query, search, bottom, right)
+                sorting, sorted_rows, unsorted, resume = None, None, None, False
+                status = show_status(stdscr, 'sort cancelled', screen_y, screen_x)
+            if running is not None:
+                running.cancel()
+                running = None
+                status = show_status(stdscr, 'command cancelled', screen_y, screen_x)
         if keypress in [ord('l'), curses.KEY_RIGHT]:
             amount = number_in(keystroke_history)
             left, right, moving_right = advance(left, right, resizing, cols, amount)
@@ -714,27 +3666,30 @@ def run(stdscr, df, keystrokes=None):
         if keypress in [ord('/')]:
             search_string = show_prompt(stdscr, chr(keypress), screen_y,
                     screen_x - 1, keystrokes=keystrokes)
-            found_row, found_col = next_match(df, search_string, bottom, right)
-            left, right, top, bottom, moving_right, moving_down = jump(
-                    left, right, top, bottom, rows, cols, found_row, found_col,
-                    resizing)
-        if keypress in [ord('n')]:
-            found_row, found_col = next_match(df, search_string, bottom, right)
-            left, right, top, bottom, moving_right, moving_down = jump(
-                    left, right, top, bottom, rows, cols, found_row, found_col,
-                    resizing)
-        if keypress in [ord('p')]:
-            found_row, found_col = prev_match(df, search_string, bottom, right)
-            left, right, top, bottom, moving_right, moving_down = jump(
-                    left, right, top, bottom, rows, cols, found_row, found_col,
-                    resizing)
+            if matches is not None:
+                matches.cancel()
+            matches, status, jumping = None, None, True
+            try:
+                query = Query.parse(search_string, left, right)
+            except re.error as e:
+                query, jumping = None, None
+                status = show_status(stdscr, 'invalid search: {}'.format(e),
+                                     screen_y, screen_x)
+            if query is not None and query.string:
+                matches = Matches(df, query, search, bottom, right)
+        if keypress in [ord('n'), ord('p')] and query is not None:
+            jumping = keypress == ord('n')
+            if matches is None and query.string:
+                matches = Matches(df, query, search, bottom, right)
+        if keypress in [ord('i')]:
+            status = show_status(stdscr, '{}, {}'.format(
+                    search.stats(), sorts.stats()), screen_y, screen_x)
         if keypress in [ord(':')]:
             command = show_prompt(stdscr, chr(keypress), screen_y,
                     screen_x - 1, keystrokes=keystrokes)
-            new_df = eval_command(stdscr, df, command, screen_y, left, right,
-                                  top, bottom, keystrokes)
-            if new_df is not None:
-                df = new_df
+            if running is not None:
+                running.cancel()
+            running = Command(df, command, left, right, top, bottom)
         if keypress in [ord('g')]:
             if keystroke_history and keystroke_history[-1] == 'g':
                 left, right, top, bottom, moving_right, moving_down = jump(
@@ -749,15 +3704,59 @@ def run(stdscr, df, keystrokes=None):
         if keypress in [ord('$')]:
             left, right, top, bottom, moving_right, moving_down = jump(
                     left, right, top, bottom, rows, cols, bottom, cols - 1, resizing)
-        if keypress in [ord('s')]:
-            df = df.sort_values(df.columns[right], ascending=True, kind='mergesort')
-        if keypress in [ord('S')]:
-            df = df.sort_values(df.columns[right], ascending=False, kind='mergesort')
+        if keypress in [ord('s'), ord('S')]:
+            # Sort by every selected column, leftmost first
+            by = right if left == right else tuple(range(left, right + 1))
+            ascending = keypress == ord('s')
+            if sorting is not None:
+                sorting.cancel()
+            sorted_rows = 0 # swap in known sorts at once
+            if sorts.known(by, ascending) or keystrokes is not None:
+                pass
+            elif left == right and origin_y == 0 and bottom < unfrozen_y and \
+                    2 * unfrozen_y < rows and sorts.quick(by):
+                # Show the first screen sorted while the rest are sorted; the
+                # selection is not kept on its rows, which may not be among them
+                sorted_rows = 2 * unfrozen_y
+                if matches is not None:
+                    matches.cancel()
+                matches, unsorted, resume = None, df, matches is not None
+                df = sorts.top(by, ascending, sorted_rows)
+                cache.invalidate()
+            else:
+                sorted_rows = None # keep showing the previous order meanwhile
+            sorting = Sorting(sorts, by, ascending)
+        # Jump to the next or previous match as soon as it is known
+        if jumping is not None:
+            if matches is None:
+                match = (next_match if jumping else prev_match)(
+                        df, query, bottom, right, search)
+            else:
+                if keystrokes is not None:
+                    matches.wait()
+                match = matches.step(bottom, right, jumping)
+            if match is not False:
+                jumping = None
+                found_row, found_col = match if match else (None, None)
+                if match:
+                    left, right, top, bottom, moving_right, moving_down = jump(
+                            left, right, top, bottom, rows, cols, found_row,
+                            found_col, resizing)
         # Store keystroke in history
         try:
             keystroke_history.append(chr(keypress))
         except ValueError:
             pass
+        # Apply queued keystrokes before drawing again, at most max_fps times
+        redraw = keystrokes is not None or \
+                not pending_input(stdscr, drawn_at + 1 / max_fps)
+    if matches is not None:
+        matches.cancel()
+        matches.wait()
+    if running is not None:
+        running.cancel()
+        running.wait()
+    search.close()
 
 
 def to_dataframe(filepath):